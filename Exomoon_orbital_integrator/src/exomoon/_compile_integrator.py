@@ -0,0 +1,22 @@
+"""
+Ahead-of-time build of the leapfrog kernel (removes first-call JIT latency).
+Run once per environment:  python -m exomoon._compile_integrator
+Writes integrator_aot.<ext> next to this file; integrator.py picks it up if present.
+"""
+import os
+from numba.pycc import CC
+
+from exomoon.integrator import _integrate_into
+
+cc = CC("integrator_aot")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Same argument order as integrator._integrate_into (float64 state and outputs)
+cc.export(
+    "integrate_into",
+    "void(f8[:], f8[:], f8[:], f8[:], f8[:], f8[:], f8, f8, f8, f8, i8, i8, "
+    "f8[:, :], f8[:, :], f8[:, :], f8[:, :], f8[:, :], f8[:, :])",
+)(_integrate_into.py_func)
+
+if __name__ == "__main__":
+    cc.compile()
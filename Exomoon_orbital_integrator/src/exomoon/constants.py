@@ -15,4 +15,5 @@ stefboltz = 5.6696e-8 # W m^-2 K^-4
 parsec = 3.0856e16
 F_earth = 1370.0     # W/m^2
 
-FOUR_PI2 = 4.0 * np.pi**2
\ No newline at end of file
+FOUR_PI2 = 4.0 * np.pi**2
+MERTH_OVER_MSUN = merth / msun
\ No newline at end of file
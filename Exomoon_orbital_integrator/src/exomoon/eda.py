@@ -1,4 +1,5 @@
 import io, json, base64
+from functools import lru_cache
 import numpy as np
 
 try:
@@ -7,24 +8,30 @@ try:
 except Exception:
     _HAS_PANDAS = False
 
-def traj_to_frame(sim: dict):
+def traj_to_arrays(sim: dict) -> dict:
+    """Trajectory table as a dict of 1-D arrays (name -> column); no pandas involved."""
     traj = sim["traj"]
-    xyz_mp = traj["xyzarr_mp"]
-    xyz_ms = traj["xyzarr_ms"]
-    xyz_mm = traj["xyzarr_mm"]
+    # Column-major copies so every xyz[:, k] column below is contiguous
+    xyz_mp = np.asfortranarray(traj["xyzarr_mp"])
+    xyz_ms = np.asfortranarray(traj["xyzarr_ms"])
+    xyz_mm = np.asfortranarray(traj["xyzarr_mm"])
     vel_mp = traj.get("velarr_mp")
     vel_ms = traj.get("velarr_ms")
     vel_mm = traj.get("velarr_mm")
+    if vel_mp is not None and vel_ms is not None and vel_mm is not None:
+        vel_mp = np.asfortranarray(vel_mp)
+        vel_ms = np.asfortranarray(vel_ms)
+        vel_mm = np.asfortranarray(vel_mm)
 
     dt = sim["dt"]
     n = xyz_mp.shape[0]
-    t = np.arange(n) * dt  # years
+    t = np.arange(n) * (dt * sim.get("store_every", 1))  # years
 
     # Relative vectors and distances
     rel_mm_mp = xyz_mm - xyz_mp
     rel_mp_ms = xyz_mp - xyz_ms
-    moon_planet_dist = np.sqrt((rel_mm_mp**2).sum(axis=1))
-    planet_star_dist = np.sqrt((rel_mp_ms**2).sum(axis=1))
+    moon_planet_dist = np.sqrt(np.einsum("ij,ij->i", rel_mm_mp, rel_mm_mp))
+    planet_star_dist = np.sqrt(np.einsum("ij,ij->i", rel_mp_ms, rel_mp_ms))
 
     data = {
         "t_years": t,
@@ -45,28 +52,71 @@ def traj_to_frame(sim: dict):
             "star_vx": vel_ms[:, 0], "star_vy": vel_ms[:, 1], "star_vz": vel_ms[:, 2],
             "planet_vx": vel_mp[:, 0], "planet_vy": vel_mp[:, 1], "planet_vz": vel_mp[:, 2],
             "moon_vx": vel_mm[:, 0], "moon_vy": vel_mm[:, 1], "moon_vz": vel_mm[:, 2],
-            "moon_speed": np.sqrt((vel_mm**2).sum(axis=1)),
-            "planet_speed": np.sqrt((vel_mp**2).sum(axis=1)),
-            "star_speed": np.sqrt((vel_ms**2).sum(axis=1)),
+            "moon_speed": np.sqrt(np.einsum("ij,ij->i", vel_mm, vel_mm)),
+            "planet_speed": np.sqrt(np.einsum("ij,ij->i", vel_mp, vel_mp)),
+            "star_speed": np.sqrt(np.einsum("ij,ij->i", vel_ms, vel_ms)),
         })
 
-    if _HAS_PANDAS:
-        return pd.DataFrame(data)
-    return data  # dict-of-arrays fallback
+    return data
+
+def traj_to_frame(sim: dict, as_frame: bool = True):
+    data = traj_to_arrays(sim)
+    if as_frame and _HAS_PANDAS:
+        return _arrays_to_frame(data)
+    return data  # dict-of-arrays (callers that only need arrays, or no pandas)
+
+def _arrays_to_frame(data: dict):
+    # One 2-D float block instead of per-column placement/validation. Stacked as
+    # (n_cols, n_rows) and wrapped transposed, so every DataFrame column stays contiguous
+    cols = list(data.keys())
+    return pd.DataFrame(np.vstack([data[c] for c in cols]).T, columns=cols, copy=False)
 
 def to_csv_bytes(frame) -> bytes:
-    if _HAS_PANDAS:
+    if not hasattr(frame, "to_csv") and _HAS_PANDAS:
+        # Dict-of-arrays: same shortest round-trip number format as a DataFrame export
+        frame = _arrays_to_frame(frame)
+    if hasattr(frame, "to_csv"):
         buf = io.StringIO()
         frame.to_csv(buf, index=False)
         return buf.getvalue().encode()
-    # Manual CSV for dict-of-arrays
+    # No pandas: let NumPy format the rows in C (17 significant digits, also round-trips)
     cols = list(frame.keys())
-    n = len(frame[cols[0]])
-    out = io.StringIO()
-    out.write(",".join(cols) + "\n")
-    for i in range(n):
-        out.write(",".join(str(frame[c][i]) for c in cols) + "\n")
-    return out.getvalue().encode()
+    arr = np.column_stack([np.asarray(frame[c], dtype=np.float64) for c in cols])
+    out = io.BytesIO()
+    np.savetxt(out, arr, fmt="%.17g", delimiter=",", header=",".join(cols), comments="")
+    return out.getvalue()
+
+def traj_to_csv_stream(sim: dict, columns, fileobj, fmt: str = "%.17g"):
+    """
+    Write the trajectory table straight to a binary file object (no in-memory CSV).
+    columns: requested names (unknown ones ignored; t_years always first), or None for all.
+    Returns (columns_written, n_rows).
+    """
+    frame = traj_to_arrays(sim)
+    keep = [c for c in (columns or []) if c in frame and c != "t_years"]
+    cols = ["t_years"] + keep if keep else list(frame.keys())
+    arr = np.column_stack([np.asarray(frame[c], dtype=np.float64) for c in cols])
+    np.savetxt(fileobj, arr, fmt=fmt, delimiter=",", header=",".join(cols), comments="")
+    return cols, arr.shape[0]
+
+def envelope_indices(y, max_points: int = 4000) -> np.ndarray:
+    """
+    Sorted indices into y keeping each bucket's min and max (plus both endpoints), so a line
+    plot of ~max_points samples has the same envelope as the full series.
+    """
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    y = np.asarray(y)
+    # ceil-sized buckets cover every sample; the tail is padded with y[-1] (already in the last
+    # bucket, so its min/max are unchanged) and padded hits are clipped back to n - 1
+    size = -(-n // max(1, (max_points - 2) // 2))
+    n_buckets = -(-n // size)
+    blocks = np.concatenate((y, np.repeat(y[-1:], n_buckets * size - n))).reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    idx = np.concatenate(([0, n - 1], offsets + blocks.argmin(axis=1), offsets + blocks.argmax(axis=1)))
+    idx = np.minimum(idx, n - 1)
+    return np.unique(idx)
 
 def _pretty_name(name: str) -> str:
     # Human-friendly labels
@@ -92,38 +142,47 @@ def _unit_for(name: str) -> str | None:
     if name.startswith(("moon_rel_", "planet_rel_")): return "AU"
     return None
 
+@lru_cache(maxsize=128)
 def var_info(name: str) -> tuple[str, str | None]:
     """
-    Return (pretty_label, unit or None) for a variable.
+    Return (pretty_label, unit or None) for a variable (memoized: the EDA paths ask per trace,
+    title and axis label).
     """
     return _pretty_name(name), _unit_for(name)
 
 
+_TRAJ_KEYS = (("xyz_mp", "xyzarr_mp"), ("xyz_ms", "xyzarr_ms"), ("xyz_mm", "xyzarr_mm"),
+              ("vel_mp", "velarr_mp"), ("vel_ms", "velarr_ms"), ("vel_mm", "velarr_mm"))
+
 def pack_sim(sim: dict) -> str:
-    # Store minimal arrays + dt + t_end; include velocities if present; base64 for compact transport
+    # Compressed .npz of the raw arrays + dt/t_end; base64 so it fits in a dcc.Store string
     traj = sim["traj"]
-    payload = {
-        "dt": sim["dt"],
-        "t_end": sim["t_end"],
-        "xyz_mp": traj["xyzarr_mp"].tolist(),
-        "xyz_ms": traj["xyzarr_ms"].tolist(),
-        "xyz_mm": traj["xyzarr_mm"].tolist(),
-        "vel_mp": traj.get("velarr_mp").tolist() if traj.get("velarr_mp") is not None else None,
-        "vel_ms": traj.get("velarr_ms").tolist() if traj.get("velarr_ms") is not None else None,
-        "vel_mm": traj.get("velarr_mm").tolist() if traj.get("velarr_mm") is not None else None,
+    arrays = {
+        "dt": np.asarray(sim["dt"], dtype=np.float64),
+        "t_end": np.asarray(sim["t_end"], dtype=np.float64),
+        "store_every": np.asarray(sim.get("store_every", 1), dtype=np.int64),
     }
-    raw = json.dumps(payload).encode()
-    return base64.b64encode(raw).decode()
+    for name, key in _TRAJ_KEYS:
+        if traj.get(key) is not None:
+            arrays[name] = traj[key]
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **arrays)
+    return base64.b64encode(buf.getvalue()).decode()
+
+def _unpack_json(raw: bytes) -> dict:
+    # Legacy format: base64(JSON of nested lists)
+    payload = json.loads(raw.decode())
+    traj = {key: np.array(payload[name], dtype=float) if payload.get(name) is not None else None
+            for name, key in _TRAJ_KEYS}
+    return {"dt": payload["dt"], "t_end": payload["t_end"],
+            "store_every": payload.get("store_every", 1), "traj": traj}
 
 def unpack_sim(packed: str) -> dict:
     raw = base64.b64decode(packed.encode())
-    payload = json.loads(raw.decode())
-    traj = {
-        "xyzarr_mp": np.array(payload["xyz_mp"], dtype=float),
-        "xyzarr_ms": np.array(payload["xyz_ms"], dtype=float),
-        "xyzarr_mm": np.array(payload["xyz_mm"], dtype=float),
-        "velarr_mp": np.array(payload["vel_mp"], dtype=float) if payload.get("vel_mp") is not None else None,
-        "velarr_ms": np.array(payload["vel_ms"], dtype=float) if payload.get("vel_ms") is not None else None,
-        "velarr_mm": np.array(payload["vel_mm"], dtype=float) if payload.get("vel_mm") is not None else None,
-    }
-    return {"dt": payload["dt"], "t_end": payload["t_end"], "traj": traj}
\ No newline at end of file
+    if not raw.startswith(b"PK"):  # .npz is a zip archive; anything else is the old JSON payload
+        return _unpack_json(raw)
+    with np.load(io.BytesIO(raw)) as npz:
+        traj = {key: npz[name] if name in npz.files else None for name, key in _TRAJ_KEYS}
+        store_every = int(npz["store_every"]) if "store_every" in npz.files else 1
+        return {"dt": float(npz["dt"]), "t_end": float(npz["t_end"]),
+                "store_every": store_every, "traj": traj}
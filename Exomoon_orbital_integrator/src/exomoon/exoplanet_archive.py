@@ -1,5 +1,14 @@
 import requests
 import re
+import threading
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+
+try:
+    from cachetools import TTLCache, cached
+    _HAS_CACHETOOLS = True
+except Exception:
+    _HAS_CACHETOOLS = False
 
 API = "https://exoplanetarchive.ipac.caltech.edu/TAP/sync"
 
@@ -10,18 +19,53 @@ COLS = ",".join([
 
 HEADERS = {"User-Agent": "ExomoonOrbitalIntegrator/0.1 (contact: your-email@example.com)"}
 
+# Shared keep-alive session: reuses the TLS connection across queries
+_SESSION = requests.Session()
+_SESSION.headers.update(HEADERS)
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+def _memoize(fn):
+    # TAP results are deterministic in the SQL text; expire after 5 min so the archive can update
+    if _HAS_CACHETOOLS:
+        return cached(TTLCache(maxsize=2048, ttl=300), lock=threading.Lock())(fn)
+    return lru_cache(maxsize=2048)(fn)
+
+def _sql_str(s: str) -> str:
+    # ADQL string literal body: double single quotes, drop control characters
+    return "".join(ch for ch in s if ch >= " ").replace("'", "''")
+
+@_memoize
 def _query_sql(sql: str):
-    resp = requests.post(API, data={"query": sql, "format": "json"}, headers=HEADERS, timeout=20)
+    # GET (read-only TAP sync) so identical queries are cacheable by HTTP intermediaries
+    resp = _SESSION.get(API, params={"query": sql, "format": "json"}, timeout=20)
     if not resp.ok:
         msg = resp.text.strip()[:500]
         raise requests.HTTPError(f"TAP error {resp.status_code}: {msg}")
     return resp.json()
 
+# Parsed records keyed by case/space-normalized name ("HD 209458 b" == " hd  209458 b"), same TTL as _query_sql
+_RECORD_CACHE_MAX = 512
+_record_cache = TTLCache(maxsize=_RECORD_CACHE_MAX, ttl=300) if _HAS_CACHETOOLS else {}
+_record_lock = threading.Lock()
+_MISS = object()
+
 def fetch_system_by_planet(pl_name: str) -> dict | None:
     if not pl_name:
         return None
-    name = pl_name.strip()
-    name_lit = name.replace("'", "''")
+    name = " ".join(pl_name.split())
+    key = name.casefold()
+    with _record_lock:
+        rec = _record_cache.get(key, _MISS)
+    if rec is _MISS:
+        rec = _fetch_system(name)
+        with _record_lock:
+            if not _HAS_CACHETOOLS and len(_record_cache) >= _RECORD_CACHE_MAX:
+                _record_cache.clear()
+            _record_cache[key] = rec
+    return dict(rec) if rec is not None else None  # callers may edit their copy
+
+def _fetch_system(name: str) -> dict | None:
+    name_lit = _sql_str(name)
 
     sql1 = f"SELECT {COLS} FROM pscomppars WHERE pl_name='{name_lit}'"
     try:
@@ -57,6 +101,24 @@ def fetch_system_by_planet(pl_name: str) -> dict | None:
         "ep": row.get("pl_orbeccen"),
     }
 
+# Complete (under-limit) autocomplete result sets keyed by normalized query, same TTL as _query_sql
+_PREFIX_CACHE_MAX = 512
+_prefix_cache = TTLCache(maxsize=_PREFIX_CACHE_MAX, ttl=300) if _HAS_CACHETOOLS else {}
+_prefix_lock = threading.Lock()
+
+def _rank_names(names: list[str], q: str) -> list[str]:
+    # Same ordering as the SQL CASE below: prefix, then ' <number>' token, then name
+    m = re.search(r"\d+", q)
+    num_tok = f" {m.group(0)}" if m else None
+    def key(n):
+        low = n.lower()
+        if low.startswith(q):
+            return (0, n)
+        if num_tok is not None and num_tok in low:
+            return (1, n)
+        return (2, n)
+    return sorted(names, key=key)
+
 def search_planets(query: str, limit: int = 25) -> list[str]:
     """
     Return up to 'limit' planet names matching query, ranked so:
@@ -66,14 +128,26 @@ def search_planets(query: str, limit: int = 25) -> list[str]:
     """
     if not query:
         return []
-    # Normalize spacing and escape
-    q = " ".join(query.split())
-    q_esc = q.replace("'", "''")
+    # Normalize spacing/case (matching is case-insensitive) so retyped queries hit the cache
+    q = " ".join(query.split()).lower()
+    # LIKE wildcards would match differently in SQL than the cached substring filter below,
+    # and no archive name contains them, so such queries have no matches either way
+    if "%" in q or "_" in q:
+        return []
+
+    # A shorter prefix whose result set was complete already contains every match for q
+    with _prefix_lock:
+        for k in range(len(q), 0, -1):
+            hit = _prefix_cache.get(q[:k])
+            if hit is not None:
+                return _rank_names([n for n in hit if q in n.lower()], q)[:limit]
+
+    q_esc = _sql_str(q)
 
     # Build ordering that prioritizes prefix and then numeric chunk (if any)
     m = re.search(r"\d+", q)
     if m:
-        num = m.group(0).replace("'", "''")
+        num = m.group(0)  # digits only
         order = (
             f"CASE "
             f"WHEN UPPER(pl_name) LIKE UPPER('{q_esc}%') THEN 0 "            # starts with typed text
@@ -90,7 +164,13 @@ def search_planets(query: str, limit: int = 25) -> list[str]:
     cond = f"UPPER(pl_name) LIKE UPPER('%{q_esc}%')"
     sql = f"SELECT TOP {int(limit)} pl_name FROM pscomppars WHERE {cond} ORDER BY {order}"
     rows = _query_sql(sql)
-    return [r.get("pl_name") for r in rows if r.get("pl_name")]
+    names = [r.get("pl_name") for r in rows if r.get("pl_name")]
+    if len(rows) < int(limit):
+        with _prefix_lock:
+            if not _HAS_CACHETOOLS and len(_prefix_cache) >= _PREFIX_CACHE_MAX:
+                _prefix_cache.clear()
+            _prefix_cache[q] = names
+    return names
     
 def estimate_density_gcc(mp_earth: float | None, pr_earth: float | None) -> float | None:
     if mp_earth is None or pr_earth is None or pr_earth <= 0:
@@ -1,10 +1,16 @@
 import numpy as np
 from .constants import stefboltz, F_earth, au
 
+# L / (4 pi F) = rs^2 sigma Ts^4 / F, so a = rs Ts^2 sqrt(sigma / F): no per-call sqrt
+_HZ_SCALE = np.sqrt(stefboltz / F_earth) / au
+_INV_SQRT_1p1 = 1.0 / np.sqrt(1.1)  # inner edge: 1.1 F_earth
+_INV_SQRT_0p5 = 1.0 / np.sqrt(0.5)  # outer edge: 0.5 F_earth
+
 def hz_bounds_au(Ts_K: float, rs_m: float):
-    L_star = 4 * np.pi * rs_m**2 * stefboltz * Ts_K**4
-    F_inner = 1.1 * F_earth
-    F_outer = 0.5 * F_earth
-    a_inner_m = np.sqrt(L_star / (4 * np.pi * F_inner))
-    a_outer_m = np.sqrt(L_star / (4 * np.pi * F_outer))
-    return a_inner_m / au, a_outer_m / au
\ No newline at end of file
+    base = _HZ_SCALE * rs_m * Ts_K * Ts_K
+    return base * _INV_SQRT_1p1, base * _INV_SQRT_0p5
+
+def hz_bounds_au_batch(Ts_K, rs_m):
+    """Vectorized hz_bounds_au for parameter scans; broadcasts Ts_K against rs_m."""
+    base = _HZ_SCALE * np.asarray(rs_m, dtype=np.float64) * np.square(np.asarray(Ts_K, dtype=np.float64))
+    return base * _INV_SQRT_1p1, base * _INV_SQRT_0p5
@@ -1,5 +1,5 @@
 import numpy as np
-from exomoon.constants import rsun, msun, merth, FOUR_PI2
+from exomoon.constants import rsun, merth, FOUR_PI2, MERTH_OVER_MSUN
 from exomoon.params import SystemParams
 
 def initial_state(p: SystemParams):
@@ -8,65 +8,46 @@ def initial_state(p: SystemParams):
     rs_m = p.rs_solar * rsun
 
     # Dimensionless gravitational parameters
+    earth_mu = MERTH_OVER_MSUN * FOUR_PI2
     ms = p.ms_solar * FOUR_PI2
-    mp = p.mp_earth * (merth / msun) * FOUR_PI2
-    mm = p.mm_earth * (merth / msun) * FOUR_PI2
+    mp = p.mp_earth * earth_mu
+    mm = p.mm_earth * earth_mu
+
+    # Shared subexpressions
+    mpm = mp + mm
+    mtot = ms + mpm
+    ap_peri = p.ap_AU * (1.0 - p.ep)
 
     # Hill radius and moon-planet distance (AU)
-    rhill = p.ap_AU * (1.0 - p.ep) * ((mp / (3 * ms)) ** (1.0 / 3.0))
+    rhill = ap_peri * ((mp / (3 * ms)) ** (1.0 / 3.0))
     am_AU = p.am_hill * rhill
+    am_peri = am_AU * (1.0 - p.em)
 
-    
+    inv_v_star = 1.0 / (mtot * ap_peri) ** 0.5
+    inv_v_moon = 1.0 / (mpm * am_peri) ** 0.5
 
     # Planet-moon barycenter about system barycenter
-    xpm = p.ap_AU * (1 - p.ep) * ms / (ms + mp + mm)
-    ypm = zpm = 0.0
-    vxpm = vzpm = 0.0
-    vypm = ms / ((1 - p.ep) * (mp + mm + ms) * p.ap_AU) ** 0.5
-
-    # Star
-    xs = -p.ap_AU * (1 - p.ep) * (mp + mm) / (ms + mp + mm)
-    ys = zs = 0.0
-    vxs = vzs = 0.0
-    vys = -(mp + mm) / ((1 - p.ep) * (mp + mm + ms) * p.ap_AU) ** 0.5
-
-    # Planet relative to PM barycenter, then to system barycenter
-    yp = zp = 0.0
-    xp = -am_AU * (1 - p.em) * mm / (mp + mm)
-    xp = xpm + xp
-    vxp = vzp = 0.0
-    vyp = -mm / ((1 - p.em) * (mp + mm) * am_AU) ** 0.5
-    
+    xpm = ap_peri * ms / mtot
+    vypm = ms * inv_v_star
 
-    # Moon relative to PM barycenter, then to system barycenter
-    ym = zm = 0.0
-    xm = am_AU * (1 - p.em) * mp / (mp + mm)
-    xm = xpm + xm
-    vxm = vzm = 0.0
-    vym = mp / ((1 - p.em) * (mp + mm) * am_AU) ** 0.5
-    
     dir_sign = -1.0 if getattr(p, "moon_retrograde", False) else 1.0
-    vyp *= dir_sign
-    vym *= dir_sign
-
-    vyp = vypm + vyp
-    vym = vypm + vym
-
-    
-    #vel_mm = vel_mm * dir_sign
 
-    pos_mp = np.array([xp, yp, zp], dtype=float)
-    pos_ms = np.array([xs, ys, zs], dtype=float)
-    pos_mm = np.array([xm, ym, zm], dtype=float)
-    vel_mp = np.array([vxp, vyp, vzp], dtype=float)
-    vel_ms = np.array([vxs, vys, vzs], dtype=float)
-    vel_mm = np.array([vxm, vym, vzm], dtype=float)
+    # Rows: planet, star, moon; every body starts on the x-axis moving in y
+    pos = np.zeros((3, 3))
+    vel = np.zeros((3, 3))
+    # Planet/moon relative to PM barycenter, then to system barycenter
+    pos[0, 0] = xpm - am_peri * mm / mpm
+    pos[1, 0] = -ap_peri * mpm / mtot
+    pos[2, 0] = xpm + am_peri * mp / mpm
+    vel[0, 1] = vypm - dir_sign * mm * inv_v_moon
+    vel[1, 1] = -mpm * inv_v_star
+    vel[2, 1] = vypm + dir_sign * mp * inv_v_moon
 
     return dict(
         rp_km=rp_km, rs_m=rs_m,
         ms=ms, mp=mp, mm=mm,
         am_AU=am_AU,
         rhill_AU=rhill,
-        pos_mp=pos_mp, pos_ms=pos_ms, pos_mm=pos_mm,
-        vel_mp=vel_mp, vel_ms=vel_ms, vel_mm=vel_mm
+        pos_mp=pos[0], pos_ms=pos[1], pos_mm=pos[2],
+        vel_mp=vel[0], vel_ms=vel[1], vel_mm=vel[2]
     )
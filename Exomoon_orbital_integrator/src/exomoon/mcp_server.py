@@ -1,41 +1,211 @@
 from pathlib import Path
 from time import perf_counter
+from dataclasses import asdict, fields
 from typing import Dict, Any
-from urllib.parse import urlencode
-import sys, traceback, re, json
+from urllib.parse import quote_plus
+import sys, os, traceback, re, json, math, hashlib
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, get_ident
+from functools import cache, wraps
+from contextlib import contextmanager
+import asyncio
 
 from fastmcp import FastMCP
 
 from exomoon.params import SystemParams
-from exomoon.simulation import run_simulation, run_simulation_for_years
-from exomoon.plotting.anim import build_animation
-from exomoon.eda import traj_to_frame, to_csv_bytes, var_info
+from exomoon.simulation import cached_simulation
+from exomoon.eda import traj_to_arrays, envelope_indices, traj_to_csv_stream, var_info
+from exomoon.plotting.encode import json_default
 import numpy as np
-import plotly.graph_objects as go
 from exomoon.exoplanet_archive import fetch_system_by_planet, search_planets
 from exomoon.moon_stability import assess_moon_stability as _assess_moon_stability  # import the function symbol
 from exomoon.moon_stability import analyze_moon_escape as _analyze_moon_escape
+from exomoon.moon_stability import warmup
+
+try:
+    import orjson
+    _HAS_ORJSON = True
+    _json_loads = orjson.loads
+except Exception:
+    _HAS_ORJSON = False
+    _json_loads = json.loads
 
 mcp = FastMCP("exomoon")
 
-def _params_from_dict(d: Dict[str, Any]) -> SystemParams:
-    base = SystemParams()
-    def f(k, cur):
-        return cur if d.get(k) is None or d.get(k) == "" else float(d[k])
-    def b(key):
-        v = d.get(key)
-        if v is None: return False
-        if isinstance(v, bool): return v
-        if isinstance(v, (int,float)): return bool(v)
-        v = str(v).lower().strip()
-        return v in ("retro","retrograde","true","1","yes")
-    return SystemParams(
-        Ts=f("Ts", base.Ts), rs_solar=f("rs_solar", base.rs_solar), ms_solar=f("ms_solar", base.ms_solar),
-        mp_earth=f("mp_earth", base.mp_earth), dp_cgs=f("dp_cgs", base.dp_cgs),
-        ap_AU=f("ap_AU", base.ap_AU), ep=f("ep", base.ep),
-        mm_earth=f("mm_earth", base.mm_earth), am_hill=f("am_hill", base.am_hill), em=f("em", base.em),
-        moon_retrograde=b("moon_retrograde") or b("moon_dir"),
-    )
+def _offload(fn):
+    # Run a blocking tool body on a worker thread so the event loop keeps serving other calls
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return wrapper
+
+# Compile/load the Numba kernels before the server announces its tools, not on the first call
+if not os.environ.get("EXOMOON_SKIP_WARMUP"):
+    try:
+        warmup()
+    except Exception:
+        print("[exomoon] kernel warm-up failed:\n", traceback.format_exc(), file=sys.stderr, flush=True)
+
+_OUTDIR = Path("outputs")
+
+@cache
+def _outdir() -> Path:
+    # mkdir once per process, on first write (not at import)
+    _OUTDIR.mkdir(exist_ok=True)
+    return _OUTDIR
+
+@cache
+def _plotting():
+    # Plotly + the animation builder load on first render, not at server start
+    from exomoon.plotting.anim import build_animation
+    return build_animation
+
+@cache
+def _plotlyjs_name() -> str:
+    from plotly.offline import get_plotlyjs_version
+    return f"plotly-{get_plotlyjs_version()}.min.js"
+
+def _ensure_plotlyjs(outdir: Path) -> None:
+    # One shared local copy of plotly.js per output dir (versioned name, so upgrades don't reuse a stale copy)
+    asset = outdir / _plotlyjs_name()
+    if not asset.exists():
+        from plotly.offline import get_plotlyjs
+        tmp = asset.with_name(f".{asset.name}.{os.getpid()}.{get_ident()}.tmp")
+        tmp.write_text(get_plotlyjs(), encoding="utf-8")
+        os.replace(tmp, asset)  # concurrent writers: last rename wins, never a partial file
+
+@cache
+def _html_head() -> bytes:
+    # Static page shell, built once; figure JSON is spliced in as bytes
+    return (
+        '<html>\n<head><meta charset="utf-8" /></head>\n<body>\n'
+        '<div id="g" style="height:100%; width:100%;"></div>\n'
+        f'<script src="{_plotlyjs_name()}"></script>\n'
+        '<script>\nvar gd = document.getElementById("g");\nPlotly.newPlot(gd, '
+    ).encode()
+
+_HTML_TAIL = b');\n</script>\n</body>\n</html>\n'
+
+@contextmanager
+def _replacing(path: Path):
+    # Yields a temp path next to path and renames it over path on success, so concurrent
+    # tool calls never leave a partial or interleaved file behind
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{get_ident()}.tmp")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+def _fast_write_html(fig: dict, path: Path) -> None:
+    """
+    Write a {"data", "layout", "frames"} figure dict as an HTML page that loads plotly.js from a
+    shared copy next to it (works offline), serializing with orjson when available.
+    path is replaced atomically: it is either absent, the previous page, or the complete new one.
+    """
+    if not _HAS_ORJSON:
+        import plotly.io as pio
+        with _replacing(path) as tmp:
+            pio.write_html(fig, str(tmp), include_plotlyjs="directory", validate=False)
+        return
+    _ensure_plotlyjs(path.parent)
+    def dumps(obj):
+        return orjson.dumps(obj, default=json_default)
+    parts = [_html_head(),
+             dumps(fig["data"]), b", ",
+             dumps(fig.get("layout", {})), b', {"responsive": true})']
+    if fig.get("frames"):
+        frames = dumps(fig["frames"])
+        parts += [b".then(function () { return Plotly.addFrames(gd, ", frames, b"); })"]
+    parts.append(_HTML_TAIL)
+    with _replacing(path) as tmp:
+        tmp.write_bytes(b"".join(parts))
+
+# Animations are built/written off the request path: tools return figure_path (pending) right away
+_HTML_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="exomoon-html")
+
+def _write_animation(sim: dict, path: Path) -> None:
+    build_animation = _plotting()
+    fig = build_animation(sim["traj"], sim["a_inner_au"], sim["a_outer_au"],
+                          open_in_browser=False, dt=sim["dt"], t_end=sim["t_end"],
+                          lightweight=True)
+    _fast_write_html(fig, path)  # atomic, so figure_path is either absent or complete
+
+# In-flight writes by target path: a repeat call for the same run joins the pending write
+_HTML_PENDING: Dict[Path, Any] = {}
+_HTML_LOCK = Lock()
+
+def _output_name(prefix: str, p: SystemParams, years: float | None, extra: Any = None,
+                 suffix: str = ".html") -> str:
+    # Keyed by the run inputs (plus any tool options in extra), so different requests never
+    # share (or overwrite) an output file
+    key = hashlib.sha1(json.dumps([asdict(p), years, extra], sort_keys=True).encode()).hexdigest()[:12]
+    return f"{prefix}_{key}{suffix}"
+
+def _status_path(path: Path) -> Path:
+    return path.with_name(path.name + ".status.json")
+
+def _write_status(path: Path, status: str, message: str | None = None) -> None:
+    # Sidecar for polling clients: {"status": "pending" | "ready" | "error", ...}, replaced atomically
+    target = _status_path(path)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.{get_ident()}.tmp")
+    tmp.write_text(json.dumps({"status": status, "figure_path": str(path.resolve()), "message": message}))
+    os.replace(tmp, target)
+
+def _read_status(path: Path) -> str | None:
+    try:
+        return json.loads(_status_path(path).read_text()).get("status")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _figure_status(fut) -> str:
+    if not fut.done():
+        return "pending"
+    return "error" if fut.exception() is not None else "ready"
+
+def _animation_done(path: Path, fut) -> None:
+    exc = fut.exception()
+    if exc is not None:
+        print("[exomoon] HTML write error:\n", "".join(traceback.format_exception(exc)),
+              file=sys.stderr, flush=True)
+    # Final status before the pending entry goes: a resubmit for path can't slip in between
+    with _HTML_LOCK:
+        _write_status(path, "error" if exc is not None else "ready", None if exc is None else str(exc))
+        _HTML_PENDING.pop(path, None)
+
+def _submit_animation(sim: dict, path: Path) -> Dict[str, Any]:
+    """
+    Start (or join) the background HTML write for path. figure_path exists only once the write
+    has finished; figure_status / the status file at status_path say when that is.
+    """
+    paths = {"figure_path": str(path.resolve()), "status_path": str(_status_path(path).resolve())}
+    with _HTML_LOCK:
+        fut = _HTML_PENDING.get(path)
+        # Same inputs, same figure: a finished write is reused as is
+        if fut is None and path.exists() and _read_status(path) == "ready":
+            return {**paths, "figure_status": "ready"}
+        submitted = fut is None
+        if submitted:
+            # Drop a previous (failed or unfinished) copy, so a client never opens an old
+            # figure as if it were this one
+            path.unlink(missing_ok=True)
+            _write_status(path, "pending")
+            fut = _HTML_PENDING[path] = _HTML_POOL.submit(_write_animation, sim, path)
+    if submitted:
+        fut.add_done_callback(lambda f: _animation_done(path, f))
+    return {**paths, "figure_status": _figure_status(fut)}
+
+_PARAM_KEYS = frozenset(f.name for f in fields(SystemParams))
+
+_DEFAULT_PARAMS = SystemParams()  # frozen, so one shared instance is safe
+
+def _params_from_dict(norm: Dict[str, Any]) -> SystemParams:
+    # Expects _normalize_param_keys output: canonical keys, already-coerced values
+    kwargs = {k: v for k, v in norm.items() if k in _PARAM_KEYS}
+    return SystemParams(**kwargs) if kwargs else _DEFAULT_PARAMS
+
+_NUM_RE = re.compile(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?')
 
 def _num(val):
     if val is None:
@@ -43,7 +213,15 @@ def _num(val):
     if isinstance(val, (int, float)):
         return float(val)
     if isinstance(val, str):
-        m = re.search(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?', val.strip())
+        s = val.strip()
+        # Clean numeric strings (the common case) skip the regex
+        try:
+            x = float(s)
+            if math.isfinite(x):
+                return x
+        except ValueError:
+            pass
+        m = _NUM_RE.search(s)
         if m:
             try:
                 return float(m.group(0))
@@ -51,36 +229,48 @@ def _num(val):
                 return None
     return None
 
+# Canonical keys -> accepted aliases; inverted once at import
+_ALIAS_MAPPING = {
+    "Ts": ["Ts", "ts", "star_temp", "stellar_temp"],
+    "rs_solar": ["rs_solar", "R_sun", "star_radius"],
+    "ms_solar": ["ms_solar", "M_sun", "star_mass"],
+    "mp_earth": ["mp_earth", "planet_mass", "M_earth_p", "mp"],
+    "dp_cgs": ["dp_cgs", "planet_density", "rho_p"],
+    "ap_AU": ["ap_AU", "a_planet", "semi_major_axis"],
+    "ep": ["ep", "e_planet", "ecc_p"],
+    # moon
+    "mm_earth": ["mm_earth", "moon_mass", "M_earth_m", "mm"],
+    "am_hill": ["am_hill", "a_moon_hill", "a_moon_frac", "am"],
+    "em": ["em", "e_moon", "ecc_m"],
+    "moon_retrograde": ["moon_retrograde","moon_dir","retrograde","orbit_dir"],
+    # simulation duration
+    "years": ["years","t_years","duration","sim_years"]
+}
+_ALIAS_INV = {alias: key for key, aliases in _ALIAS_MAPPING.items() for alias in aliases}
+_NUMERIC_KEYS = frozenset(("Ts","rs_solar","ms_solar","mp_earth","dp_cgs","ap_AU","ep",
+                           "mm_earth","am_hill","em","years"))
+_RETRO_TOKENS = frozenset(("retro","retrograde","r","true","1","yes"))  # "r" as in the Dash query parser
+
+def _truthy(v: Any) -> bool:
+    if v is None:
+        return False
+    if isinstance(v, (bool, int, float)):
+        return bool(v)
+    return str(v).strip().lower() in _RETRO_TOKENS
+_URL_KEYS = ("Ts","rs_solar","ms_solar","mp_earth","dp_cgs","ap_AU","ep",
+             "mm_earth","am_hill","em","years")
+_fmt_num = "{:.12g}".format
+
 def _normalize_param_keys(d: Dict[str, Any]) -> Dict[str, Any]:
     if not d:
         return {}
     out = {}
-    # canonical keys
-    mapping = {
-        "Ts": ["Ts", "ts", "star_temp", "stellar_temp"],
-        "rs_solar": ["rs_solar", "R_sun", "star_radius"],
-        "ms_solar": ["ms_solar", "M_sun", "star_mass"],
-        "mp_earth": ["mp_earth", "planet_mass", "M_earth_p", "mp"],
-        "dp_cgs": ["dp_cgs", "planet_density", "rho_p"],
-        "ap_AU": ["ap_AU", "a_planet", "semi_major_axis"],
-        "ep": ["ep", "e_planet", "ecc_p"],
-        # moon
-        "mm_earth": ["mm_earth", "moon_mass", "M_earth_m", "mm"],
-        "am_hill": ["am_hill", "a_moon_hill", "a_moon_frac", "am"],
-        "em": ["em", "e_moon", "ecc_m"],
-        "moon_retrograde": ["moon_retrograde","moon_dir","retrograde","orbit_dir"],
-        # simulation duration
-        "years": ["years","t_years","duration","sim_years"]
-    }
-    inv = {alias: key for key, aliases in mapping.items() for alias in aliases}
     for k, v in d.items():
-        key = inv.get(k, k)
+        key = _ALIAS_INV.get(k, k)
         if key == "moon_retrograde":
-            val = str(v).lower().strip()
-            out[key] = val in ("retro","retrograde","true","1","yes")
-            continue
-
-        if key in ("Ts","rs_solar","ms_solar","mp_earth","dp_cgs","ap_AU","ep","mm_earth","am_hill","em","years"):
+            # moon_retrograde / moon_dir / ... may all be present: any of them can set it
+            out[key] = out.get(key, False) or _truthy(v)
+        elif key in _NUMERIC_KEYS:
             num = _num(v)
             if num is not None:
                 out[key] = num
@@ -94,7 +284,7 @@ def _coerce_params_to_dict(params: Any) -> Dict[str, Any]:
         return params
     if isinstance(params, str):
         try:
-            data = json.loads(params)
+            data = _json_loads(params)
             return data if isinstance(data, dict) else {}
         except Exception:
             return {}
@@ -115,6 +305,7 @@ def env_info() -> Dict[str, Any]:
         return {"error": str(e), "trace": traceback.format_exc()}
 
 @mcp.tool()
+@_offload
 def fetch_exoplanet(name: str) -> Dict[str, Any]:
     name = (name or "").strip()
     if not name:
@@ -129,20 +320,27 @@ def fetch_exoplanet(name: str) -> Dict[str, Any]:
         return {"ok": False, "message": f"Error: {e}", "data": None, "candidates": []}
 
 @mcp.tool()
-def run_sim(params: Dict[str, Any]) -> Dict[str, Any]:
+@_offload
+def run_sim(params: Dict[str, Any], emit_html: bool = True) -> Dict[str, Any]:
+    """
+    Run one planet orbit. emit_html=False skips the animation/HTML and returns
+    only the summary fields (figure_path is null). The HTML is written in the
+    background: figure_status is "pending" until the file appears at figure_path;
+    the JSON file at status_path then reports "ready" (or "error"). Repeating a call
+    whose figure is already written returns it as "ready" without rebuilding it.
+    """
     try:
-        p = _params_from_dict(params or {})
+        p = _params_from_dict(_normalize_param_keys(params or {}))
         t0 = perf_counter()
-        sim = run_simulation(p)
+        sim = cached_simulation(p)
         t1 = perf_counter()
-        fig = build_animation(sim["traj"], sim["a_inner_au"], sim["a_outer_au"],
-                              open_in_browser=False, dt=sim["dt"], t_end=sim["t_end"])
-        outdir = Path("outputs"); outdir.mkdir(exist_ok=True)
-        outfile = outdir / "exomoon_sim.html"
-        fig.write_html(str(outfile), include_plotlyjs="cdn")
+        figure = {"figure_path": None, "figure_status": None, "status_path": None}
+        if emit_html:
+            outdir = _outdir()
+            figure = _submit_animation(sim, outdir / _output_name("exomoon_sim", p, None))
         return {
             "ok": True,
-            "figure_path": str(outfile.resolve()),
+            **figure,
             "t_end": sim["t_end"],
             "rhill_AU": sim["state"].get("rhill_AU"),
             "dt": sim["dt"],
@@ -154,33 +352,37 @@ def run_sim(params: Dict[str, Any]) -> Dict[str, Any]:
         return {"ok": False, "message": str(e)}
 
 @mcp.tool()
-def run_sim_years(params: Dict[str, Any], years: float | None = None) -> Dict[str, Any]:
+@_offload
+def run_sim_years(params: Dict[str, Any], years: float | None = None,
+                  emit_html: bool = True) -> Dict[str, Any]:
     """
     Run multi-year simulation.
     You can pass years either as the separate argument or inside params (e.g. {"years": 10}).
-    Returns: figure_path, t_end, rhill_AU, dt, n_steps, runtime_s, used_years.
+    emit_html=False skips the animation/HTML (figure_path is null); otherwise the
+    HTML is written in the background and appears at figure_path once complete
+    (figure_status / the status file at status_path, as for run_sim).
+    Returns: figure_path, figure_status, status_path, t_end, rhill_AU, dt, n_steps,
+    runtime_s, used_years.
     """
     try:
-        raw = params or {}
+        norm = _normalize_param_keys(params or {})
         # Extract years if positional not supplied
         if years is None:
-            norm = _normalize_param_keys(raw)
             years = norm.get("years")
         if years is None:
             return {"ok": False, "message": "Missing years (pass argument or include 'years' in params)."}
         years_f = float(years)
-        p = _params_from_dict(raw)
+        p = _params_from_dict(norm)
         t0 = perf_counter()
-        sim = run_simulation_for_years(p, years_f)
+        sim = cached_simulation(p, years_f)
         t1 = perf_counter()
-        fig = build_animation(sim["traj"], sim["a_inner_au"], sim["a_outer_au"],
-                              open_in_browser=False, dt=sim["dt"], t_end=sim["t_end"])
-        outdir = Path("outputs"); outdir.mkdir(exist_ok=True)
-        outfile = outdir / f"exomoon_sim_{int(round(years_f))}y.html"
-        fig.write_html(str(outfile), include_plotlyjs="cdn")
+        figure = {"figure_path": None, "figure_status": None, "status_path": None}
+        if emit_html:
+            outdir = _outdir()
+            figure = _submit_animation(sim, outdir / _output_name(f"exomoon_sim_{int(round(years_f))}y", p, years_f))
         return {
             "ok": True,
-            "figure_path": str(outfile.resolve()),
+            **figure,
             "t_end": sim["t_end"],
             "rhill_AU": sim["state"].get("rhill_AU"),
             "dt": sim["dt"],
@@ -193,54 +395,48 @@ def run_sim_years(params: Dict[str, Any], years: float | None = None) -> Dict[st
         return {"ok": False, "message": str(e)}
 
 # Keep existing names, but add the exact alias Claude mentions; all wrap errors clearly.
-@mcp.tool()
-def check_moon_stability(params: Dict[str, Any], years: float, escape_factor: float = 1.0) -> Dict[str, Any]:
+def _assess_impl(params: Dict[str, Any], years: float, escape_factor: float, stop_on_escape: bool,
+                 tool: str, analyze=_assess_moon_stability) -> Dict[str, Any]:
+    # Shared body of the stability tools (several names kept for client compatibility)
     try:
-        p = _params_from_dict(params or {})
-        res = _assess_moon_stability(p, float(years), float(escape_factor))
+        p = _params_from_dict(_normalize_param_keys(params or {}))
+        res = analyze(p, float(years), float(escape_factor), bool(stop_on_escape))
         res["ok"] = True
         return res
     except Exception as e:
-        print("[exomoon] check_moon_stability error:\n", traceback.format_exc(), file=sys.stderr, flush=True)
+        print(f"[exomoon] {tool} error:\n", traceback.format_exc(), file=sys.stderr, flush=True)
         return {"ok": False, "message": str(e)}
 
 @mcp.tool()
-def assess_stability(params: Dict[str, Any], years: float, escape_factor: float = 1.0) -> Dict[str, Any]:
-    try:
-        p = _params_from_dict(params or {})
-        res = _assess_moon_stability(p, float(years), float(escape_factor))
-        res["ok"] = True
-        return res
-    except Exception as e:
-        print("[exomoon] assess_stability error:\n", traceback.format_exc(), file=sys.stderr, flush=True)
-        return {"ok": False, "message": str(e)}
+@_offload
+def check_moon_stability(params: Dict[str, Any], years: float, escape_factor: float = 1.0,
+                         stop_on_escape: bool = False) -> Dict[str, Any]:
+    return _assess_impl(params, years, escape_factor, stop_on_escape, "check_moon_stability")
+
+@mcp.tool()
+@_offload
+def assess_stability(params: Dict[str, Any], years: float, escape_factor: float = 1.0,
+                     stop_on_escape: bool = False) -> Dict[str, Any]:
+    return _assess_impl(params, years, escape_factor, stop_on_escape, "assess_stability")
 
 @mcp.tool()
-def assess_moon_stability(params: Dict[str, Any], years: float, escape_factor: float = 1.0) -> Dict[str, Any]:
+@_offload
+def assess_moon_stability(params: Dict[str, Any], years: float, escape_factor: float = 1.0,
+                          stop_on_escape: bool = False) -> Dict[str, Any]:
     """Alias matching the function name to avoid any naming confusion."""
-    try:
-        p = _params_from_dict(params or {})
-        res = _assess_moon_stability(p, float(years), float(escape_factor))
-        res["ok"] = True
-        return res
-    except Exception as e:
-        print("[exomoon] assess_moon_stability tool error:\n", traceback.format_exc(), file=sys.stderr, flush=True)
-        return {"ok": False, "message": str(e)}
-    
+    return _assess_impl(params, years, escape_factor, stop_on_escape, "assess_moon_stability")
+
 @mcp.tool()
-def moon_escape_info(params: Dict[str, Any], years: float, escape_factor: float = 1.0) -> Dict[str, Any]:
+@_offload
+def moon_escape_info(params: Dict[str, Any], years: float, escape_factor: float = 1.0,
+                     stop_on_escape: bool = False) -> Dict[str, Any]:
     """
     Return first escape time (years) if moon exits escape_factor * Hill radius.
     Fields: stable, escape_time (or null), escape_index, threshold, rhill_AU, max_r_rel, dt, t_end.
+    stop_on_escape=True stops integrating at the escape (much faster for unstable
+    systems; max_r_rel then only covers [0, escape_time]).
     """
-    try:
-        p = _params_from_dict(params or {})
-        res = _analyze_moon_escape(p, float(years), float(escape_factor))
-        res["ok"] = True
-        return res
-    except Exception as e:
-        print("[exomoon] moon_escape_info error:\n", traceback.format_exc(), file=sys.stderr, flush=True)
-        return {"ok": False, "message": str(e)}
+    return _assess_impl(params, years, escape_factor, stop_on_escape, "moon_escape_info", _analyze_moon_escape)
 
 # Update dash_url to include years in query string if provided:
 @mcp.tool()
@@ -263,41 +459,27 @@ def dash_url(params: Any = None,
         # Allow direct planet override
         planet_name = planet or raw.get("pl") or raw.get("pl_name") or raw.get("planet") or raw.get("name")
         norm = _normalize_param_keys(raw)
+        if not norm and not planet_name and not autorun:
+            # Nothing to encode: plain base URL (no dangling "?")
+            return {"ok": "true", "url": base.rstrip("/") + "/", "query": "",
+                    "accepted_keys": "", "has_planet": "no"}
 
-        q: Dict[str, Any] = {}
+        # One pass over fixed keys; quote_plus matches what urlencode produced
+        parts = []
         if planet_name:
-            q["pl"] = str(planet_name).strip()
+            parts.append("pl=" + quote_plus(str(planet_name).strip()))
 
-        # Moon retrograde or direction
+        # Moon direction (moon_dir / retrograde / ... are all aliases of moon_retrograde)
         if "moon_retrograde" in norm:
-            q["moon_dir"] = "retro" if norm["moon_retrograde"] else "pro"
-        else:
-            # Accept raw moon_dir text
-            md = raw.get("moon_dir")
-            if md is not None:
-                mdv = str(md).lower().strip()
-                q["moon_dir"] = "retro" if mdv in ("retro","retrograde","r","true","1","yes") else "pro"
-
-        # Numeric params
-        for key in ("Ts","rs_solar","ms_solar","mp_earth","dp_cgs","ap_AU","ep",
-                    "mm_earth","am_hill","em","years"):
-            if key in norm:
-                val = norm[key]
-                if isinstance(val, (int,float)):
-                    # Compact float formatting
-                    if isinstance(val, float):
-                        sval = f"{val:.12g}"
-                    else:
-                        sval = str(val)
-                    if key == "years":
-                        q["years"] = sval
-                    else:
-                        q[key] = sval
+            parts.append("moon_dir=" + ("retro" if norm["moon_retrograde"] else "pro"))
+
+        # Numeric params (compact float formatting; _normalize_param_keys already made them floats)
+        parts.extend(f"{key}={quote_plus(_fmt_num(norm[key]))}" for key in _URL_KEYS if key in norm)
 
         if autorun:
-            q["run"] = "1"
+            parts.append("run=1")
 
-        query = urlencode(q)
+        query = "&".join(parts)
         url = base.rstrip("/") + "/?" + query
 
         return {
@@ -305,7 +487,7 @@ def dash_url(params: Any = None,
             "url": url,
             "query": query,
             "accepted_keys": ",".join(sorted(norm.keys())),
-            "has_planet": "yes" if "pl" in q else "no",
+            "has_planet": "yes" if planet_name else "no",
         }
     except Exception as e:
         return {
@@ -329,8 +511,7 @@ def _coerce_var_list(val) -> list[str] | None:
         # JSON array string
         if s.startswith("[") and s.endswith("]"):
             try:
-                import json as _json
-                parsed = _json.loads(s)
+                parsed = _json_loads(s)
                 if isinstance(parsed, list):
                     return [str(x) for x in parsed if str(x).strip()]
             except Exception:
@@ -341,51 +522,28 @@ def _coerce_var_list(val) -> list[str] | None:
         return [s]
     return None
 
-def _is_dataframe(obj) -> bool:
-    return hasattr(obj, "columns") and hasattr(obj, "to_csv")
-
 # NEW: CSV export tool (positions + velocities)
 @mcp.tool()
+@_offload
 def export_csv(params: Dict[str, Any],
                years: float | None = None,
                columns: Any = None) -> Dict[str, Any]:
     try:
-        p = _params_from_dict(params or {})
-        sim = run_simulation_for_years(p, float(years)) if (years and float(years) > 0) else run_simulation(p)
-        frame = traj_to_frame(sim)
+        p = _params_from_dict(_normalize_param_keys(params or {}))
+        yrs = float(years) if (years and float(years) > 0) else None
+        sim = cached_simulation(p, yrs)
 
         requested = (_coerce_var_list(columns) or
                      _coerce_var_list((params or {}).get("columns")) or
                      _coerce_var_list((params or {}).get("variables")) or
                      _coerce_var_list((params or {}).get("vars")))
-        if requested:
-            all_cols = frame.columns.tolist() if _is_dataframe(frame) else list(frame.keys())
-            keep = [c for c in requested if c in all_cols]
-            if keep:
-                if _is_dataframe(frame):
-                    base_cols = ["t_years"] if "t_years" in frame else []
-                    frame = frame[base_cols + keep]
-                else:
-                    newf = {}
-                    if "t_years" in frame:
-                        newf["t_years"] = frame["t_years"]
-                    for c in keep:
-                        newf[c] = frame[c]
-                    frame = newf
-
-        csv_bytes = to_csv_bytes(frame)
-        outdir = Path("outputs"); outdir.mkdir(exist_ok=True)
-        fname = f"exomoon_dataset_{int(years)}y.csv" if (years and years > 0) else "exomoon_dataset_orbit.csv"
-        fpath = outdir / fname
-        with open(fpath, "wb") as f:
-            f.write(csv_bytes)
-
-        if _is_dataframe(frame):
-            rows = int(frame.shape[0])
-        elif isinstance(frame, dict) and "t_years" in frame:
-            rows = len(frame["t_years"])
-        else:
-            rows = None
+
+        outdir = _outdir()
+        prefix = f"exomoon_dataset_{int(yrs)}y" if yrs else "exomoon_dataset_orbit"
+        fpath = outdir / _output_name(prefix, p, yrs, requested, suffix=".csv")
+        # Stream rows to disk instead of building the whole CSV in memory first
+        with _replacing(fpath) as tmp, open(tmp, "wb") as f:
+            _cols, rows = traj_to_csv_stream(sim, requested, f)
 
         return {"ok": True, "csv_path": str(fpath.resolve()), "rows": rows,
                 "filtered_columns": requested or []}
@@ -395,16 +553,18 @@ def export_csv(params: Dict[str, Any],
 
 
 @mcp.tool()
+@_offload
 def eda_plot(params: Dict[str, Any],
              years: float | None = None,
              variables: Any = None,
              plot_type: str = "line",
              normalize: bool = False) -> Dict[str, Any]:
     try:
-        p = _params_from_dict(params or {})
-        sim = run_simulation_for_years(p, float(years)) if (years and float(years) > 0) else run_simulation(p)
-        frame = traj_to_frame(sim)
-        cols = frame.columns.tolist() if _is_dataframe(frame) else list(frame.keys())
+        p = _params_from_dict(_normalize_param_keys(params or {}))
+        yrs = float(years) if (years and float(years) > 0) else None
+        sim = cached_simulation(p, yrs)
+        frame = traj_to_arrays(sim)
+        cols = list(frame.keys())
 
         var_list = (_coerce_var_list(variables) or
                     _coerce_var_list((params or {}).get("variables")) or
@@ -417,20 +577,21 @@ def eda_plot(params: Dict[str, Any],
         if not var_list:
             return {"ok": False, "message": "No valid variables.", "available": cols}
 
-        t = frame["t_years"]
-        t_arr = t.to_numpy() if hasattr(t, "to_numpy") else np.asarray(t)
-
-        fig = go.Figure()
-        for v in var_list:
-            y = frame[v]
-            if normalize:
-                import numpy as _np
-                m = float(_np.max(_np.abs(y))) if len(y) else 1.0
-                if m != 0.0:
-                    y = y / m
-            mode = "markers" if plot_type == "scatter" else "lines"
-            label, _unit = var_info(v)
-            fig.add_trace(go.Scatter(x=t_arr, y=y, mode=mode, name=label))
+        t_arr = frame["t_years"]
+
+        # Plain trace/layout dicts (no go.Figure validation pass), WebGL rendering
+        mode = "markers" if plot_type == "scatter" else "lines"
+        # Per-bucket min/max envelope: long runs ship a few thousand points per series
+        keep = [envelope_indices(frame[v]) for v in var_list]
+        ys = [frame[v][k].astype(np.float32) for v, k in zip(var_list, keep)]  # gathered float32 copies
+        if normalize:
+            # Scale by the full series' peak |y|, not just the gathered points'
+            for v, y in zip(var_list, ys):
+                m = np.max(np.abs(frame[v])) if y.size else 0.0
+                if m:
+                    y /= m
+        traces = [dict(type="scattergl", x=t_arr[k], y=y, mode=mode, name=var_info(v)[0])
+                  for v, k, y in zip(var_list, keep, ys)]
 
         if len(var_list) == 1:
             label, unit = var_info(var_list[0])
@@ -454,21 +615,19 @@ def eda_plot(params: Dict[str, Any],
 
         xmin = float(t_arr[0]) if len(t_arr) else 0.0
         xmax = float(t_arr[-1]) if len(t_arr) else 1.0
-        fig.update_xaxes(range=[xmin, xmax])
-        fig.update_yaxes(autorange=True)
-        fig.update_layout(
-            title=title,
-            xaxis_title="Time (years)",
-            yaxis_title=ytitle,
+        fig = {"data": traces, "layout": dict(
+            title=dict(text=title),
+            xaxis=dict(title=dict(text="Time (years)"), range=[xmin, xmax]),
+            yaxis=dict(title=dict(text=ytitle), autorange=True),
             height=800,
             margin=dict(l=40, r=20, t=50, b=40),
             legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-        )
+        )}
 
-        outdir = Path("outputs"); outdir.mkdir(exist_ok=True)
-        fname = f"exomoon_eda_{int(years)}y.html" if (years and years > 0) else "exomoon_eda_orbit.html"
-        fpath = outdir / fname
-        fig.write_html(str(fpath), include_plotlyjs="cdn")
+        outdir = _outdir()
+        prefix = f"exomoon_eda_{int(yrs)}y" if yrs else "exomoon_eda_orbit"
+        fpath = outdir / _output_name(prefix, p, yrs, [var_list, plot_type, bool(normalize)])
+        _fast_write_html(fig, fpath)
 
         return {"ok": True, "figure_path": str(fpath.resolve()), "variables_used": var_list}
     except Exception as e:
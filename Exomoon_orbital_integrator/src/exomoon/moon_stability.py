@@ -1,62 +1,112 @@
+from functools import lru_cache
 import numpy as np
 from exomoon.params import SystemParams
-from exomoon.simulation import run_simulation_for_years
+from exomoon.simulation import peek_simulation, escape_scan_for_years, run_simulation_for_years
+from exomoon.simulation import warmup as _warmup_simulation
+from exomoon.integrator import _HAS_NUMBA, _escape_time, njit
 
-def assess_moon_stability(p: SystemParams, years: float, escape_factor: float = 1.0):
-    """
-    Stable if max ||r_moon - r_planet|| over [0, years] <= escape_factor * Hill radius.
-    Adds escape_time (years) if an escape occurred.
-    """
-    sim = run_simulation_for_years(p, float(years))
-    st = sim["state"]; traj = sim["traj"]
+@njit(fastmath=True, cache=True)
+def _scan_escape(xm, ym, xp, yp, threshold, dt, stop_on_escape):
+    # One pass: max in-plane separation + first crossing of threshold, with the
+    # crossing time linearly interpolated. Returns (max_r, escape_index or -1, escape_time).
+    max_r = 0.0
+    esc = -1
+    t_esc = 0.0
+    r_prev = 0.0
+    for i in range(xm.shape[0]):
+        dx = xm[i] - xp[i]
+        dy = ym[i] - yp[i]
+        r = (dx * dx + dy * dy) ** 0.5
+        if r > max_r:
+            max_r = r
+        if esc < 0 and r > threshold:
+            esc = i
+            t_esc = _escape_time(i, r, r_prev, threshold, dt)
+            if stop_on_escape:
+                break
+        r_prev = r
+    return max_r, esc, t_esc
 
-    moon_rel = traj["xyzarr_mm"] - traj["xyzarr_mp"]
-    r_rel = np.linalg.norm(moon_rel[:, :2], axis=1)
+def _scan_escape_np(xm, ym, xp, yp, threshold, dt, stop_on_escape):
+    # NumPy equivalent of _scan_escape (used when Numba is unavailable)
+    r_rel = np.hypot(xm - xp, ym - yp)
     max_r = float(np.max(r_rel))
-    rhill = float(st.get("rhill_AU")) if st.get("rhill_AU") is not None else None
+    if not max_r > threshold:
+        return max_r, -1, 0.0
+    j = int(np.argmax(r_rel > threshold))
+    if stop_on_escape:
+        max_r = float(np.max(r_rel[:j + 1]))
+    r_prev = float(r_rel[j-1]) if j > 0 else 0.0
+    return max_r, j, _escape_time(j, float(r_rel[j]), r_prev, threshold, dt)
+
+@lru_cache(maxsize=32)
+def _run_and_assess(p: SystemParams, years: float, escape_factor: float, stop_on_escape: bool):
+    # Metrics cached per (p, years, escape_factor, stop_on_escape). Reuse a stored trajectory if another
+    # tool already ran this simulation; otherwise integrate without storing one.
+    sim = peek_simulation(p, years)
+    if sim is None:
+        scan = escape_scan_for_years(p, years, escape_factor, stop_on_escape)
+        st, threshold = scan["state"], scan["threshold"]
+        max_r, j, t_esc = scan["max_r_rel"], scan["escape_index"], scan["escape_time"]
+        dt, t_end = scan["dt"], scan["t_end"]
+    else:
+        st = sim["state"]; traj = sim["traj"]
+        dt, t_end = float(sim["dt"]), float(sim["t_end"])
+        rhill = st.get("rhill_AU")
+        threshold = escape_factor * float(rhill) if rhill is not None else float("inf")
+        xm, xp = traj["xyzarr_mm"], traj["xyzarr_mp"]
+        scan = _scan_escape if _HAS_NUMBA else _scan_escape_np
+        max_r, j, t_esc = scan(xm[:, 0], xm[:, 1], xp[:, 0], xp[:, 1],
+                               threshold, dt * sim.get("store_every", 1), stop_on_escape)
 
-    threshold = (escape_factor * rhill) if rhill is not None else float("inf")
+    rhill = float(st.get("rhill_AU")) if st.get("rhill_AU") is not None else None
+    max_r = float(max_r)
     stable = (rhill is not None) and (max_r <= threshold)
 
     escape_time = None
     escape_index = None
-    if not stable and rhill is not None:
-        # first index where r_rel > threshold
-        idxs = np.where(r_rel > threshold)[0]
-        if idxs.size:
-            j = int(idxs[0])
-            # Time mapping: index j corresponds to (j+1)*dt (see integrator loop)
-            dt = float(sim["dt"])
-            t_prev = j * dt
-            r_prev = r_rel[j-1] if j > 0 else r_rel[j]
-            r_curr = r_rel[j]
-            # Linear interpolation (only if growth across boundary)
-            if j > 0 and r_curr > r_prev:
-                frac = (threshold - r_prev) / (r_curr - r_prev)
-                frac = max(0.0, min(1.0, frac))
-                escape_time = t_prev + frac * dt
-            else:
-                escape_time = (j + 1) * dt
-            escape_index = j
+    if not stable and rhill is not None and j >= 0:
+        escape_time = float(t_esc)
+        escape_index = int(j)
 
     return {
         "stable": bool(stable),
         "max_r_rel": max_r,
         "rhill_AU": rhill,
         "escape_factor": float(escape_factor),
-        "t_end": float(sim["t_end"]),
+        "t_end": float(t_end),
         "escape_time": escape_time,
         "escape_index": escape_index,
         "threshold": threshold if rhill is not None else None,
+        "dt": float(dt),
     }
 
-def analyze_moon_escape(p: SystemParams, years: float, escape_factor: float = 1.0):
+def assess_moon_stability(p: SystemParams, years: float, escape_factor: float = 1.0,
+                          stop_on_escape: bool = False):
+    """
+    Stable if max ||r_moon - r_planet|| over [0, years] <= escape_factor * Hill radius.
+    Adds escape_time (years) if an escape occurred.
+    stop_on_escape=True ends the run at the escape (max_r_rel then covers [0, escape_time]).
+    """
+    res = dict(_run_and_assess(p, float(years), float(escape_factor), bool(stop_on_escape)))
+    del res["dt"]
+    return res
+
+def analyze_moon_escape(p: SystemParams, years: float, escape_factor: float = 1.0,
+                        stop_on_escape: bool = False):
     """
     Detailed escape analysis. Always returns:
       stable, threshold, escape_time, escape_index, max_r_rel, rhill_AU, dt, t_end
+    stop_on_escape as in assess_moon_stability.
     """
-    res = assess_moon_stability(p, years, escape_factor)
-    # expose dt and times array info for clients
-    sim = run_simulation_for_years(p, float(years))
-    res["dt"] = float(sim["dt"])
-    return res
\ No newline at end of file
+    # Copy: the cached dict is shared
+    return dict(_run_and_assess(p, float(years), float(escape_factor), bool(stop_on_escape)))
+
+def warmup():
+    """Compile (or load from cache) the integrator and stability kernels up front."""
+    _warmup_simulation()
+    if _HAS_NUMBA:
+        # Same argument types/layouts as _run_and_assess (strided column views of a stored run)
+        traj = run_simulation_for_years(SystemParams(), 1e-3)["traj"]  # >1 row: non-contiguous views
+        xm, xp = traj["xyzarr_mm"], traj["xyzarr_mp"]
+        _scan_escape(xm[:, 0], xm[:, 1], xp[:, 0], xp[:, 1], 1.0, 1e-6, False)
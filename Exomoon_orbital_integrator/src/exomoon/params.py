@@ -1,7 +1,8 @@
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SystemParams:
+    # Frozen so instances are hashable (simulation cache keys); slots: no per-instance __dict__
     # Stellar
     Ts: float = 5772
     rs_solar: float = 1.0
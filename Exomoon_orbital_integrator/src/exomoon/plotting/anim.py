@@ -1,7 +1,25 @@
 import numpy as np
-import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.io as pio
+from exomoon.integrator import _HAS_NUMBA, njit
+
+@njit(fastmath=True, cache=True)
+def _max_planar_sep(xyz_a, xyz_b):
+    # max over rows of the in-plane |a - b|, in one pass (no temporaries)
+    best = 0.0
+    for i in range(xyz_a.shape[0]):
+        dx = xyz_a[i, 0] - xyz_b[i, 0]
+        dy = xyz_a[i, 1] - xyz_b[i, 1]
+        r2 = dx * dx + dy * dy
+        if r2 > best:
+            best = r2
+    return best ** 0.5
+
+def _max_planar_sep_np(xyz_a, xyz_b):
+    dx = xyz_a[:, 0] - xyz_b[:, 0]
+    dy = xyz_a[:, 1] - xyz_b[:, 1]
+    dx *= dx; dy *= dy; dx += dy
+    return float(np.sqrt(dx.max()))  # sqrt of the max, not of every sample
 
 def build_animation(traj: dict,
                     a_inner_au: float,
@@ -10,32 +28,30 @@ def build_animation(traj: dict,
                     dt: float | None = None,
                     t_end: float | None = None,
                     max_frames: int = 5000,
-                    playback_seconds: float | None = None):
+                    playback_seconds: float | None = None,
+                    lightweight: bool = False):
     """
-    Build animated figure.
+    Build the animated figure as a plain {"data", "layout", "frames"} dict (trail arrays stay
+    ndarrays); render it with plotly.io show/write_html(..., validate=False).
     dt, t_end (years) allow time-scaled slider labels & adaptive playback.
     max_frames caps displayed frames (keeps UI responsive).
     playback_seconds (wall time) if None scales with t_end (clamped 12–90 s).
+    lightweight: draw full static trails once and animate only the markers,
+    so frame JSON is O(frames) instead of O(frames x trail_window).
     """
     if open_in_browser:
         pio.renderers.default = "browser"
 
-    xyzarr_ms = traj["xyzarr_ms"].astype(np.float32, copy=False)
-    xyzarr_mp = traj["xyzarr_mp"].astype(np.float32, copy=False)
-    xyzarr_mm = traj["xyzarr_mm"].astype(np.float32, copy=False)
+    xyzarr_ms = traj["xyzarr_ms"]
+    xyzarr_mp = traj["xyzarr_mp"]
+    xyzarr_mm = traj["xyzarr_mm"]
 
     timesteps = len(xyzarr_mp)
 
-    # Frame sampling: evenly spaced indices up to max_frames (no stride bias)
-    n_frames = min(timesteps, max_frames)
-    frame_indices = np.linspace(0, timesteps - 1, n_frames, dtype=int)
-
-    # Physical time array (years) if dt provided
+    # Physical duration (years) if dt provided
     if dt is not None:
-        time_arr = frame_indices * dt
         total_time = (timesteps - 1) * dt if t_end is None else float(t_end)
     else:
-        time_arr = frame_indices.astype(float)
         total_time = float(t_end) if t_end is not None else float(timesteps)
 
     # Decide playback duration (wall clock seconds)
@@ -44,8 +60,15 @@ def build_animation(traj: dict,
         playback_seconds = float(np.clip(total_time * 3.0, 12.0, 90.0))
     playback_seconds = max(5.0, float(playback_seconds))
 
+    # Frame sampling: evenly spaced indices (no stride bias), up to max_frames and to what
+    # playback_seconds can show at the shortest frame duration (more would only slow playback)
+    min_frame_ms = 15
+    n_frames = min(timesteps, max_frames, int(playback_seconds * 1000.0 / min_frame_ms))
+    frame_indices = np.linspace(0, timesteps - 1, n_frames, dtype=int)
+    time_arr = frame_indices * dt if dt is not None else frame_indices.astype(float)
+
     # Frame duration (ms); clamp for usability
-    frame_duration_ms = int(np.clip(playback_seconds * 1000.0 / n_frames, 15, 250))
+    frame_duration_ms = int(np.clip(playback_seconds * 1000.0 / n_frames, min_frame_ms, 250))
     transition_ms = min(frame_duration_ms // 2, 120)
 
     # Plot ranges (based on HZ outer radius)
@@ -54,16 +77,18 @@ def build_animation(traj: dict,
     x_range = [-(1 + pad_frac) * hz_r, (1 + pad_frac) * hz_r]
     y_range = [-(1 + pad_frac) * hz_r, (1 + pad_frac) * hz_r]
 
-    # Moon relative for zoom
-    moon_rel = xyzarr_mm - xyzarr_mp
-    r_rel = 1.2 * np.max(np.sqrt(moon_rel[:, 0] ** 2 + moon_rel[:, 1] ** 2))
+    # Moon relative for zoom: max over the full run
+    max_sep = _max_planar_sep if _HAS_NUMBA else _max_planar_sep_np
+    r_rel = 1.2 * float(max_sep(xyzarr_mm, xyzarr_mp))
     zoom_range = [-r_rel, r_rel]
 
-    # Decimated arrays (sampled at frame indices)
-    ms_x = xyzarr_ms[frame_indices, 0]; ms_y = xyzarr_ms[frame_indices, 1]
-    mp_x = xyzarr_mp[frame_indices, 0]; mp_y = xyzarr_mp[frame_indices, 1]
-    mm_x = xyzarr_mm[frame_indices, 0]; mm_y = xyzarr_mm[frame_indices, 1]
-    mr_x = moon_rel[frame_indices, 0];  mr_y = moon_rel[frame_indices, 1]
+    # Everything below uses only the sampled rows: gather x/y once as contiguous float32 columns
+    def sampled_xy(xyz):
+        return np.ascontiguousarray(xyz[frame_indices, :2].T, dtype=np.float32)
+    ms_x, ms_y = sampled_xy(xyzarr_ms)
+    mp_x, mp_y = sampled_xy(xyzarr_mp)
+    mm_x, mm_y = sampled_xy(xyzarr_mm)
+    mr_x, mr_y = mm_x - mp_x, mm_y - mp_y
 
     # Trail window (frames kept visible behind current point)
     trail_window = min(400, n_frames // 3 if n_frames > 600 else 200)
@@ -71,7 +96,8 @@ def build_animation(traj: dict,
     zoom_height_frac = 0.35
     top_bottom = (1 - zoom_height_frac) / 2.0
 
-    fig = make_subplots(
+    # The subplot grid (axis domains, titles) comes from make_subplots; everything else is plain dicts
+    base = make_subplots(
         rows=3, cols=2,
         column_widths=[0.78, 0.22],
         row_heights=[top_bottom, zoom_height_frac, top_bottom],
@@ -85,54 +111,44 @@ def build_animation(traj: dict,
         subplot_titles=["System Orbit", "Moon Zoom (relative)"],
     )
 
-    # Trails (initially hidden)
-    fig.add_trace(go.Scattergl(x=[], y=[], mode="lines",
-                               line=dict(color="yellow", width=1),
-                               name="Star Trail", opacity=0.3, visible=False), row=1, col=1)
-    star_trail_idx = len(fig.data) - 1
-
-    fig.add_trace(go.Scattergl(x=[], y=[], mode="lines",
-                               line=dict(color="blue", width=1),
-                               name="Planet Trail", opacity=0.3, visible=False), row=1, col=1)
-    planet_trail_idx = len(fig.data) - 1
-
-    fig.add_trace(go.Scattergl(x=[], y=[], mode="lines",
-                               line=dict(color="red", width=1),
-                               name="Moon Trail", opacity=0.3, visible=False), row=1, col=1)
-    moon_trail_idx = len(fig.data) - 1
-
-    # Moving markers
-    fig.add_trace(go.Scatter(x=[xyzarr_ms[0, 0]], y=[xyzarr_ms[0, 1]], mode="markers",
-                             marker=dict(color="yellow", size=15), name="Star"), row=1, col=1)
-    star_marker_idx = len(fig.data) - 1
-
-    fig.add_trace(go.Scatter(x=[xyzarr_mp[0, 0]], y=[xyzarr_mp[0, 1]], mode="markers",
-                             marker=dict(color="blue", size=5), name="Planet"), row=1, col=1)
-    planet_marker_idx = len(fig.data) - 1
-
-    fig.add_trace(go.Scatter(x=[xyzarr_mm[0, 0]], y=[xyzarr_mm[0, 1]], mode="markers",
-                             marker=dict(color="red", size=4), name="Moon"), row=1, col=1)
-    moon_marker_idx = len(fig.data) - 1
-
-    # Zoom panel
-    fig.add_trace(go.Scatter(x=[0], y=[0], mode="markers",
-                             marker=dict(color="blue", size=6), name="Planet (zoom)"), row=2, col=2)
-    fig.add_trace(go.Scattergl(x=[], y=[], mode="lines",
-                               line=dict(color="red", width=1),
-                               name="Moon Trail (zoom)", opacity=0.3, visible=False), row=2, col=2)
-    moon_zoom_trail_idx = len(fig.data) - 1
-
-    fig.add_trace(go.Scatter(x=[moon_rel[0, 0]], y=[moon_rel[0, 1]], mode="markers",
-                             marker=dict(color="red", size=5), name="Moon (zoom)"), row=2, col=2)
-    moon_zoom_marker_idx = len(fig.data) - 1
+    # Trails (initially hidden; static full paths in lightweight mode). Animated trails stay SVG
+    # scatter like the frames that update them; only static lightweight trails use WebGL.
+    trail_type = "scattergl" if lightweight else "scatter"
+    main, zoom = dict(xaxis="x", yaxis="y"), dict(xaxis="x2", yaxis="y2")
+
+    def trail(x, y, color, name, axes):
+        return dict(type=trail_type, x=x if lightweight else [], y=y if lightweight else [],
+                    mode="lines", line=dict(color=color, width=1),
+                    name=name, opacity=0.3, visible=lightweight, **axes)
+
+    def marker(x, y, color, size, name, axes):
+        return dict(type="scatter", x=[float(x)], y=[float(y)], mode="markers",
+                    marker=dict(color=color, size=size), name=name, **axes)
+
+    data = [
+        trail(ms_x, ms_y, "yellow", "Star Trail", main),
+        trail(mp_x, mp_y, "blue", "Planet Trail", main),
+        trail(mm_x, mm_y, "red", "Moon Trail", main),
+        # Moving markers
+        marker(ms_x[0], ms_y[0], "yellow", 15, "Star", main),
+        marker(mp_x[0], mp_y[0], "blue", 5, "Planet", main),
+        marker(mm_x[0], mm_y[0], "red", 4, "Moon", main),
+        # Zoom panel
+        marker(0, 0, "blue", 6, "Planet (zoom)", zoom),
+        trail(mr_x, mr_y, "red", "Moon Trail (zoom)", zoom),
+        marker(mr_x[0], mr_y[0], "red", 5, "Moon (zoom)", zoom),
+    ]
+    (star_trail_idx, planet_trail_idx, moon_trail_idx,
+     star_marker_idx, planet_marker_idx, moon_marker_idx,
+     _planet_zoom_idx, moon_zoom_trail_idx, moon_zoom_marker_idx) = range(len(data))
 
     # Axes & HZ
-    fig.update_xaxes(title_text="X (AU)", range=x_range, row=1, col=1)
-    fig.update_yaxes(title_text="Y (AU)", range=y_range, scaleanchor="x", scaleratio=1, row=1, col=1)
-    fig.update_xaxes(title_text="ΔX (AU)", range=zoom_range, row=2, col=2)
-    fig.update_yaxes(title_text="ΔY (AU)", range=zoom_range, scaleanchor="x2", scaleratio=1, row=2, col=2)
+    base.update_xaxes(title_text="X (AU)", range=x_range, row=1, col=1)
+    base.update_yaxes(title_text="Y (AU)", range=y_range, scaleanchor="x", scaleratio=1, row=1, col=1)
+    base.update_xaxes(title_text="ΔX (AU)", range=zoom_range, row=2, col=2)
+    base.update_yaxes(title_text="ΔY (AU)", range=zoom_range, scaleanchor="x2", scaleratio=1, row=2, col=2)
 
-    fig.update_layout(
+    base.update_layout(
         shapes=[
             dict(type="circle", xref="x1", yref="y1",
                  x0=-a_outer_au, y0=-a_outer_au, x1=a_outer_au, y1=a_outer_au,
@@ -143,47 +159,53 @@ def build_animation(traj: dict,
         ]
     )
 
-    # Build frames
-    frames = []
-    for k, idx in enumerate(frame_indices):
-        start = max(0, k - trail_window + 1)
-        frames.append(go.Frame(
-            data=[
-                go.Scatter(x=ms_x[start:k+1], y=ms_y[start:k+1], visible=True),
-                go.Scatter(x=mp_x[start:k+1], y=mp_y[start:k+1], visible=True),
-                go.Scatter(x=mm_x[start:k+1], y=mm_y[start:k+1], visible=True),
-                go.Scatter(x=mr_x[start:k+1], y=mr_y[start:k+1], visible=True),
-                go.Scatter(x=[xyzarr_ms[idx, 0]], y=[xyzarr_ms[idx, 1]]),
-                go.Scatter(x=[xyzarr_mp[idx, 0]], y=[xyzarr_mp[idx, 1]]),
-                go.Scatter(x=[xyzarr_mm[idx, 0]], y=[xyzarr_mm[idx, 1]]),
-                go.Scatter(x=[moon_rel[idx, 0]], y=[moon_rel[idx, 1]]),
-            ],
-            traces=[
-                star_trail_idx, planet_trail_idx, moon_trail_idx, moon_zoom_trail_idx,
-                star_marker_idx, planet_marker_idx, moon_marker_idx, moon_zoom_marker_idx
-            ],
-            name=str(k)
-        ))
-    fig.frames = frames
+    # Build frames (marker positions as plain floats)
+    sx, sy, px, py = ms_x.tolist(), ms_y.tolist(), mp_x.tolist(), mp_y.tolist()
+    mx, my, rx, ry = mm_x.tolist(), mm_y.tolist(), mr_x.tolist(), mr_y.tolist()
+    names = [str(k) for k in range(n_frames)]  # frame names, shared with the slider steps
+    if lightweight:
+        # Markers only; the trails above are static
+        marker_traces = [star_marker_idx, planet_marker_idx, moon_marker_idx, moon_zoom_marker_idx]
+        frames = [
+            dict(data=[dict(type="scatter", x=[sx[k]], y=[sy[k]]),
+                       dict(type="scatter", x=[px[k]], y=[py[k]]),
+                       dict(type="scatter", x=[mx[k]], y=[my[k]]),
+                       dict(type="scatter", x=[rx[k]], y=[ry[k]])],
+                 traces=marker_traces, name=names[k])
+            for k in range(n_frames)
+        ]
+    else:
+        # Trail slices are views into the sampled columns
+        all_traces = [star_trail_idx, planet_trail_idx, moon_trail_idx, moon_zoom_trail_idx,
+                      star_marker_idx, planet_marker_idx, moon_marker_idx, moon_zoom_marker_idx]
+        starts = np.maximum(0, np.arange(n_frames) - trail_window + 1).tolist()
+        frames = [
+            dict(data=[dict(type="scatter", x=ms_x[s:k+1], y=ms_y[s:k+1], visible=True),
+                       dict(type="scatter", x=mp_x[s:k+1], y=mp_y[s:k+1], visible=True),
+                       dict(type="scatter", x=mm_x[s:k+1], y=mm_y[s:k+1], visible=True),
+                       dict(type="scatter", x=mr_x[s:k+1], y=mr_y[s:k+1], visible=True),
+                       dict(type="scatter", x=[sx[k]], y=[sy[k]]),
+                       dict(type="scatter", x=[px[k]], y=[py[k]]),
+                       dict(type="scatter", x=[mx[k]], y=[my[k]]),
+                       dict(type="scatter", x=[rx[k]], y=[ry[k]])],
+                 traces=all_traces, name=names[k])
+            for k, s in enumerate(starts)
+        ]
 
     # Slider steps with physical time labels
     if dt is not None:
-        labels = [f"{t:.3f} y" for t in time_arr]
+        # Python floats format faster than numpy scalars (and than np.char.mod)
+        labels = [f"{t:.3f} y" for t in time_arr.tolist()]
     else:
-        labels = [str(i) for i in range(n_frames)]
-
-    steps = []
-    for k in range(n_frames):
-        steps.append(dict(
-            args=[[str(k)],
-                  {"frame": {"duration": frame_duration_ms, "redraw": True},
-                   "mode": "immediate",
-                   "transition": {"duration": transition_ms}}],
-            label=labels[k],
-            method="animate"
-        ))
-
-    fig.update_layout(
+        labels = names
+
+    step_args = {"frame": {"duration": frame_duration_ms, "redraw": True},
+                 "mode": "immediate",
+                 "transition": {"duration": transition_ms}}
+    steps = [dict(args=[[name], step_args], label=label, method="animate")
+             for name, label in zip(names, labels)]
+
+    base.update_layout(
         title="Three-Body Orbital Evolution",
         height=700,
         width=1200,
@@ -196,24 +218,27 @@ def build_animation(traj: dict,
             y=1.12, yanchor="top",
             buttons=[
                 dict(label="Play", method="animate",
-                     args=[None, {"frame": {"duration": frame_duration_ms, "redraw": True},
+                     args=[None, {"frame": step_args["frame"],
                                   "fromcurrent": True,
-                                  "transition": {"duration": transition_ms}}]),
+                                  "transition": step_args["transition"]}]),
                 dict(label="Pause", method="animate",
                      args=[[None], {"frame": {"duration": 0, "redraw": False},
                                     "mode": "immediate",
                                     "transition": {"duration": 0}}]),
             ],
         )],
-        sliders=[dict(
-            active=0,
-            yanchor="bottom", xanchor="left",
-            currentvalue={"font": {"size": 16}, "prefix": "Frames: ", "visible": True, "xanchor": "right"},
-            transition={"duration": transition_ms, "easing": "cubic-in-out"},
-            pad={"b": 10, "t": 55},
-            len=0.9, x=0.1, y=1.08,
-            steps=steps
-        )]
     )
-
-    return fig
\ No newline at end of file
+    sliders = [dict(
+        active=0,
+        yanchor="bottom", xanchor="left",
+        currentvalue={"font": {"size": 16}, "prefix": "Frames: ", "visible": True, "xanchor": "right"},
+        transition={"duration": transition_ms, "easing": "cubic-in-out"},
+        pad={"b": 10, "t": 55},
+        len=0.9, x=0.1, y=1.08,
+        steps=steps
+    )]
+    # Frames and slider steps (one per frame) are already in final form: they go out as-is,
+    # never through go.Frame / layout validation
+    layout = base.layout.to_plotly_json()
+    layout["sliders"] = sliders
+    return {"data": data, "layout": layout, "frames": frames}
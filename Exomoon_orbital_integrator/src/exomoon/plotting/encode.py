@@ -0,0 +1,36 @@
+import base64
+import numpy as np
+
+# plotly.js typed-array codes (no 64-bit ints in the browser)
+_BDATA_CODES = {np.dtype(k): k for k in ("f8", "f4", "i4", "u4", "i2", "u2", "i1", "u1")}
+
+def typed_array(arr: np.ndarray):
+    """ndarray as a plotly.js base64 typed-array spec (plain list for other dtypes / empty arrays)."""
+    code = _BDATA_CODES.get(arr.dtype)
+    if code is None or arr.size == 0:
+        return arr.tolist()
+    out = {"dtype": code, "bdata": base64.b64encode(np.ascontiguousarray(arr)).decode("ascii")}
+    if arr.ndim > 1:
+        out["shape"] = ",".join(str(n) for n in arr.shape)
+    return out
+
+def json_default(obj):
+    """default= hook for orjson/json: ndarrays as typed arrays, numpy scalars as Python numbers."""
+    if isinstance(obj, np.ndarray):
+        return typed_array(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def encode_arrays(obj):
+    """
+    Copy of a figure dict with every ndarray replaced by its typed-array spec, for callers that
+    hand the dict to another serializer (e.g. a Dash callback return value).
+    """
+    if isinstance(obj, dict):
+        return {k: encode_arrays(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [encode_arrays(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return typed_array(obj)
+    return obj
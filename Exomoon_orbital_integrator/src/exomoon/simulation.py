@@ -1,3 +1,5 @@
+from collections import OrderedDict
+from threading import Lock
 import numpy as np
 from exomoon.params import SystemParams
 from exomoon.initial_conditions import initial_state
@@ -5,7 +7,7 @@ import exomoon.integrator as integrator
 #from exomoon.integrator import leapfrog_integrate
 from exomoon.habitable_zone import hz_bounds_au
 
-def run_simulation(p: SystemParams):
+def run_simulation(p: SystemParams, store_every: int = 1):
     st = initial_state(p)
 
     # Periods (dimensionless units consistent with your scaling)
@@ -17,7 +19,7 @@ def run_simulation(p: SystemParams):
     dt = orbprd_mm_mp / 1_000.0
     t_end = orbprd_mm_ms
 
-    traj = integrator.leapfrog_integrate(st, t_end, dt)
+    traj = integrator.leapfrog_integrate(st, t_end, dt, store_every=store_every)
     a_inner_au, a_outer_au = hz_bounds_au(p.Ts, st["rs_m"])
 
     return dict(
@@ -26,15 +28,13 @@ def run_simulation(p: SystemParams):
         traj=traj,
         dt=dt,
         t_end=t_end,
+        store_every=store_every,
         a_inner_au=a_inner_au,
         a_outer_au=a_outer_au,
     )
 
-def run_simulation_for_years(p: SystemParams, years: float):
-    st = initial_state(p)
-
+def _years_grid(p: SystemParams, st: dict, years: float):
     # Periods (dimensionless units consistent with your scaling)
-    orbprd_mm_ms = 2.0 * np.pi * p.ap_AU**1.5 / (st["mp"] + st["ms"]) ** 0.5
     orbprd_mm_mp = 2.0 * np.pi * st["am_AU"]**1.5 / (st["mp"] + st["mm"]) ** 0.5
 
     # Resolution targets
@@ -48,12 +48,16 @@ def run_simulation_for_years(p: SystemParams, years: float):
     # Snap dt so we hit t_end exactly with integer steps
     t_end = max(1e-9, years)
     n_steps = max(1, int(np.ceil(t_end / dt)))
-    dt = t_end / n_steps
+    return t_end / n_steps, t_end
+
+def run_simulation_for_years(p: SystemParams, years: float, store_every: int = 1):
+    st = initial_state(p)
+    dt, t_end = _years_grid(p, st, years)
 
     #dt = orbprd_mm_mp / 1_000.0
     #t_end = orbprd_mm_ms
 
-    traj = integrator.leapfrog_integrate(st, t_end, dt)
+    traj = integrator.leapfrog_integrate(st, t_end, dt, store_every=store_every)
     a_inner_au, a_outer_au = hz_bounds_au(p.Ts, st["rs_m"])
 
     return dict(
@@ -62,6 +66,71 @@ def run_simulation_for_years(p: SystemParams, years: float):
         traj=traj,
         dt=dt,
         t_end=t_end,
+        store_every=store_every,
         a_inner_au=a_inner_au,
         a_outer_au=a_outer_au,
-    )
\ No newline at end of file
+    )
+
+def escape_scan_for_years(p: SystemParams, years: float, escape_factor: float = 1.0,
+                          stop_on_escape: bool = False):
+    """
+    Same run as run_simulation_for_years, but only the moon-planet escape scan is kept
+    (no trajectory). Returns state, dt, t_end, threshold, max_r_rel, escape_index (-1: none), escape_time.
+    """
+    st = initial_state(p)
+    dt, t_end = _years_grid(p, st, years)
+    rhill = st.get("rhill_AU")
+    threshold = escape_factor * float(rhill) if rhill is not None else float("inf")
+    max_r, esc, t_esc = integrator.escape_scan(st, t_end, dt, threshold, stop_on_escape)
+    return dict(state=st, dt=dt, t_end=t_end, threshold=threshold,
+                max_r_rel=max_r, escape_index=esc, escape_time=t_esc)
+
+def warmup():
+    """Run one-step simulations so the Numba kernels are compiled (or loaded from cache) up front."""
+    run_simulation_for_years(SystemParams(), 1e-6)
+    escape_scan_for_years(SystemParams(), 1e-6)
+
+_SIM_CACHE_MAX = 8
+_SIM_CACHE_MAX_BYTES = 512 * 2**20  # trajectory bytes kept alive across entries (long runs are ~70 MB each)
+_sim_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+_sim_cache_bytes = 0
+_sim_cache_lock = Lock()
+
+def _traj_nbytes(sim: dict) -> int:
+    return sum(a.nbytes for a in sim["traj"].values() if isinstance(a, np.ndarray))
+
+def _cache_key(p: SystemParams, years: float | None):
+    return (p, None if years is None else float(years))
+
+def peek_simulation(p: SystemParams, years: float | None = None):
+    """Cached simulation for (p, years) if one exists, else None (never runs one)."""
+    key = _cache_key(p, years)
+    with _sim_cache_lock:
+        sim = _sim_cache.get(key)
+        if sim is not None:
+            _sim_cache.move_to_end(key)
+        return sim
+
+def cached_simulation(p: SystemParams, years: float | None = None):
+    """
+    Memoized run_simulation (years=None) / run_simulation_for_years, keyed on (p, years).
+    The returned dict is shared between callers: treat it as read-only.
+    """
+    sim = peek_simulation(p, years)
+    if sim is not None:
+        return sim
+    key = _cache_key(p, years)
+    sim = run_simulation(p) if key[1] is None else run_simulation_for_years(p, key[1])
+    global _sim_cache_bytes
+    with _sim_cache_lock:
+        old = _sim_cache.pop(key, None)
+        if old is not None:
+            _sim_cache_bytes -= _traj_nbytes(old)
+        _sim_cache[key] = sim
+        _sim_cache_bytes += _traj_nbytes(sim)
+        # Evict least recently used entries by count and by size (the newest entry always stays)
+        while len(_sim_cache) > 1 and (len(_sim_cache) > _SIM_CACHE_MAX
+                                       or _sim_cache_bytes > _SIM_CACHE_MAX_BYTES):
+            _, evicted = _sim_cache.popitem(last=False)
+            _sim_cache_bytes -= _traj_nbytes(evicted)
+    return sim
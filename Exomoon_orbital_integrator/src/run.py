@@ -13,6 +13,7 @@ print("exomoon.simulation file:", sim_mod.__file__)
 
 from exomoon.params import SystemParams
 from exomoon.simulation import run_simulation
+import plotly.io as pio
 import exomoon.plotting.anim as anim
 #from exomoon.plotting.anim import build_animation
 
@@ -24,10 +25,12 @@ def main():
         traj=sim["traj"],
         a_inner_au=sim["a_inner_au"],
         a_outer_au=sim["a_outer_au"],
-        open_in_browser=True
+        open_in_browser=True,
+        dt=sim["dt"],
+        t_end=sim["t_end"],
     )
-    fig.show(renderer="browser")
-    fig.write_html("orbit_anim.html")
+    pio.show(fig, renderer="browser", validate=False)
+    pio.write_html(fig, "orbit_anim.html", validate=False)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,6 +1,10 @@
 import re
 import urllib.parse as _url
-import os, sys
+import os, sys, time, threading, json, uuid
+from dataclasses import asdict
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from dash import Dash, dcc, html, Input, Output, State, ctx, no_update
 import plotly.graph_objects as go
@@ -11,13 +15,27 @@ if SRC_DIR not in sys.path:
     sys.path.insert(0, SRC_DIR)
 
 from exomoon.params import SystemParams
-from exomoon.simulation import run_simulation
+from exomoon.simulation import cached_simulation
 from exomoon.plotting.anim import build_animation
+from exomoon.plotting.encode import encode_arrays
 from exomoon.exoplanet_archive import fetch_system_by_planet, estimate_density_gcc, search_planets
-from exomoon.eda import pack_sim, unpack_sim, traj_to_frame, to_csv_bytes, var_info
+from exomoon.eda import traj_to_arrays, envelope_indices, to_csv_bytes, var_info
+
+# Optional: EXOMOON_DASH_BACKGROUND=1 runs simulations in a background worker process (needs diskcache,
+# multiprocess and psutil). Off by default: that process does not share the in-memory simulation/figure caches.
+_background_manager = None
+if os.getenv("EXOMOON_DASH_BACKGROUND") == "1":
+    try:
+        import diskcache
+        from dash import DiskcacheManager
+        _background_manager = DiskcacheManager(diskcache.Cache(os.path.join(SRC_DIR, ".dash_cache")))
+    except Exception as e:
+        print(f"Background callbacks unavailable ({str(e).splitlines()[0]}); running simulations in-process",
+              file=sys.stderr)
 
 app = Dash(__name__, suppress_callback_exceptions=True,  # allow callbacks for components added later (/eda)
-    title="Exomoon Orbital Integrator (Interactive)"
+    title="Exomoon Orbital Integrator (Interactive)",
+    background_callback_manager=_background_manager,
 )
 
 _defaults = SystemParams()
@@ -88,7 +106,9 @@ controls = html.Div([
 ], style={"display": "flex", "flexDirection": "column", "gap": "10px"}),
 
 
+@lru_cache(maxsize=1)
 def _initial_figure():
+    # Built and validated once; every page load / reset reuses the same (read-only) figure dict
     fig = go.Figure()
     fig.update_layout(
         xaxis=dict(visible=False),
@@ -102,7 +122,7 @@ def _initial_figure():
         height=700,
         title="Exomoon Orbital Integrator"
     )
-    return fig
+    return fig.to_dict()
 
 # NEW: main vs EDA page containers
 def _main_page():
@@ -141,14 +161,19 @@ def _eda_page():
     ])
 
 
-app.layout = html.Div([
-    dcc.Location(id="url", refresh=False),
-    dcc.Store(id="kick", data=""),
-    dcc.Store(id="simdata", data=""),
-    dcc.Download(id="download-csv"),
-    html.Div(controls, style={"width": "380px", "padding": "12px", "borderRight": "1px solid #ddd"}),
-    html.Div(id="page-content", children=_main_page(), style={"flex": "1", "padding": "12px"})
-], style={"display": "flex", "height": "100vh", "fontFamily": "Segoe UI, Arial"})
+def _layout():
+    # Built per page load, so each browser tab gets its own client id
+    return html.Div([
+        dcc.Location(id="url", refresh=False),
+        dcc.Store(id="kick", data=""),
+        dcc.Store(id="simdata", data=""),
+        dcc.Store(id="client-id", data=uuid.uuid4().hex),
+        dcc.Download(id="download-csv"),
+        html.Div(controls, style={"width": "380px", "padding": "12px", "borderRight": "1px solid #ddd"}),
+        html.Div(id="page-content", children=_main_page(), style={"flex": "1", "padding": "12px"})
+    ], style={"display": "flex", "height": "100vh", "fontFamily": "Segoe UI, Arial"})
+
+app.layout = _layout
 
 # NEW: router
 @app.callback(
@@ -161,11 +186,17 @@ def route(pathname):
     return _main_page()
 
 def _fnum(v, default):
+    if v is None:
+        return default
+    if isinstance(v, (int, float)):  # sliders / number inputs: no string handling needed
+        return float(v)
     try:
-        return default if v is None or (isinstance(v, str) and v.strip() == "") else float(v)
+        return default if isinstance(v, str) and v.strip() == "" else float(v)
     except Exception:
         return default
 
+_NUM_RE = re.compile(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?')
+
 def _parse_floatish(val, cur):
     # Accept numbers or strings with units (e.g., "2.54 M_earth", "0.4 R_hill")
     if val is None:
@@ -173,7 +204,7 @@ def _parse_floatish(val, cur):
     if isinstance(val, (int, float)):
         return float(val)
     if isinstance(val, str):
-        m = re.search(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?', val.strip())
+        m = _NUM_RE.search(val)
         if m:
             try:
                 return float(m.group(0))
@@ -181,32 +212,72 @@ def _parse_floatish(val, cur):
                 return cur
     return cur
 
+def _apply_record(rec, Ts, rs, ms, mp, ap, ep, dp):
+    # Archive values over the current ones (missing/zero fields keep the current value);
+    # density is estimated from mass and radius
+    est_rho = estimate_density_gcc(rec.get("mp_earth"), rec.get("pl_rade"))
+    return (rec.get("Ts") or Ts, rec.get("rs_solar") or rs, rec.get("ms_solar") or ms,
+            rec.get("mp_earth") or mp, rec.get("ap_AU") or ap, rec.get("ep") or ep, est_rho or dp)
+
+# Background archive lookups for likely picks (fetch_system_by_planet caches the records)
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="exomoon-prefetch")
+_PREFETCH_MAX = 3
+
+def _prefetch_record(name):
+    try:
+        fetch_system_by_planet(name)
+    except Exception:
+        pass  # the real fetch on selection reports errors
+
+# Server-side debounce for the typeahead: each keystroke waits briefly and is dropped if the
+# same client typed on (a newer query extends it), so a fast-typed name costs one archive search.
+# Recent queries are kept per client id, so one user's typing never suppresses another's results.
+_TYPEAHEAD_SETTLE_S = 0.25
+_typeahead_lock = threading.Lock()
+_typeahead_recent: dict[str, list[tuple[float, str]]] = {}
+
+def _superseded(client: str, q: str) -> bool:
+    now = time.monotonic()
+    with _typeahead_lock:
+        for c in list(_typeahead_recent):
+            kept = [(t, s) for t, s in _typeahead_recent[c] if now - t < 5.0]
+            if kept:
+                _typeahead_recent[c] = kept
+            else:
+                del _typeahead_recent[c]
+        _typeahead_recent.setdefault(client, []).append((now, q))
+    time.sleep(_TYPEAHEAD_SETTLE_S)
+    with _typeahead_lock:
+        return any(t > now and len(s) > len(q) and s.startswith(q)
+                   for t, s in _typeahead_recent.get(client, ()))
+
 # NEW: populate suggestions when typing in the textbox
 @app.callback(
     Output("pl_picker", "options"),
     Input("pl_picker", "search_value"),
     State("pl_picker", "value"),
+    State("client-id", "data"),
     prevent_initial_call=False,
 )
-def planet_typeahead(search_value, current_value):
+def planet_typeahead(search_value, current_value, client_id):
     q = (search_value or "").strip()
     # If user cleared the search box or fewer than 3 chars: keep current selection visible
     if len(q) < 3:
         if current_value:
             return [{"label": current_value, "value": current_value}]
         return []
+    if _superseded(client_id or "", q):
+        return no_update
     try:
         names = search_planets(q, limit=50)
         # Ensure current selection stays in list
         if current_value and current_value not in names:
             names = [current_value] + names
-        # Deduplicate while preserving order
-        seen = set()
-        ordered = []
-        for n in names:
-            if n not in seen:
-                seen.add(n)
-                ordered.append(n)
+        ordered = list(dict.fromkeys(names))  # deduplicate, preserving order
+        if len(ordered) <= _PREFETCH_MAX:
+            # Few candidates left: fetch their records now so the pick is a cache hit
+            for n in ordered:
+                _PREFETCH_POOL.submit(_prefetch_record, n)
         return [{"label": n, "value": n} for n in ordered[:25]]
     except Exception:
         return [{"label": current_value, "value": current_value}] if current_value else []
@@ -238,24 +309,19 @@ def planet_typeahead(search_value, current_value):
     prevent_initial_call=False,
 )
 def populate_from_url_or_nasa(url_search, n_clicks, pl_value, mm_val, ah_val, em_val, dir_val, years_val):
-    d = SystemParams()
+    d = _defaults
     status = ""
 
     # Start with current (or defaults on first load)
-    def _fv(v, default):
-        try:
-            return default if v is None or (isinstance(v, str) and v.strip() == "") else float(v)
-        except Exception:
-            return default
-
     Ts, rs, ms, mp, ap, ep, dp = d.Ts, d.rs_solar, d.ms_solar, d.mp_earth, d.ap_AU, d.ep, d.dp_cgs
-    mm, ah, em = _fv(mm_val, d.mm_earth), _fv(ah_val, d.am_hill), _fv(em_val, d.em)
-    sim_years = _fv(years_val, 0.0)
+    mm, ah, em = _fnum(mm_val, d.mm_earth), _fnum(ah_val, d.am_hill), _fnum(em_val, d.em)
+    sim_years = _fnum(years_val, 0.0)
     kick = ""
     moon_dir = dir_val or "pro"
 
-    # URL path
-    if url_search:
+    # URL path: only on page load / URL change, so button clicks and dropdown picks
+    # don't re-parse the query string and re-fetch its planet (or override the pick)
+    if url_search and ctx.triggered_id in (None, "url"):
         try:
             q = {k: v[0] for k, v in _url.parse_qs(url_search.lstrip("?")).items()}
             pl = q.get("pl")
@@ -265,14 +331,7 @@ def populate_from_url_or_nasa(url_search, n_clicks, pl_value, mm_val, ah_val, em
                     if rec:
                         status = f"Loaded: {rec.get('pl_name')} (host: {rec.get('hostname')})"
                         pl_value = rec.get("pl_name") or pl
-                        Ts = rec.get("Ts") or Ts
-                        rs = rec.get("rs_solar") or rs
-                        ms = rec.get("ms_solar") or ms
-                        mp = rec.get("mp_earth") or mp
-                        ap = rec.get("ap_AU") or ap
-                        ep = rec.get("ep") or ep
-                        est_rho = estimate_density_gcc(rec.get("mp_earth"), rec.get("pl_rade"))
-                        dp = est_rho or dp
+                        Ts, rs, ms, mp, ap, ep, dp = _apply_record(rec, Ts, rs, ms, mp, ap, ep, dp)
                     else:
                         status = f"No results for '{pl}'."
                 except Exception as e:
@@ -302,14 +361,7 @@ def populate_from_url_or_nasa(url_search, n_clicks, pl_value, mm_val, ah_val, em
             if rec:
                 status = f"Loaded: {rec.get('pl_name')} (host: {rec.get('hostname')})"
                 pl_value = rec.get("pl_name") or picked
-                Ts = rec.get("Ts") or Ts
-                rs = rec.get("rs_solar") or rs
-                ms = rec.get("ms_solar") or ms
-                mp = rec.get("mp_earth") or mp
-                ap = rec.get("ap_AU") or ap
-                ep = rec.get("ep") or ep
-                est_rho = estimate_density_gcc(rec.get("mp_earth"), rec.get("pl_rade"))
-                dp = est_rho or dp
+                Ts, rs, ms, mp, ap, ep, dp = _apply_record(rec, Ts, rs, ms, mp, ap, ep, dp)
                 return (status, pl_value, Ts, rs, ms, mp, ap, ep, dp, mm, ah, em, moon_dir, sim_years, kick)
             else:
                 status = f"No results for '{picked}'."
@@ -328,14 +380,7 @@ def populate_from_url_or_nasa(url_search, n_clicks, pl_value, mm_val, ah_val, em
                 return (f"No results for '{picked}'.", pl_value, Ts, rs, ms, mp, ap, ep, dp, mm, ah, em, moon_dir, sim_years, kick)
             status = f"Loaded: {rec.get('pl_name')} (host: {rec.get('hostname')})"
             pl_value = rec.get("pl_name") or picked
-            Ts = rec.get("Ts") or Ts
-            rs = rec.get("rs_solar") or rs
-            ms = rec.get("ms_solar") or ms
-            mp = rec.get("mp_earth") or mp
-            ap = rec.get("ap_AU") or ap
-            ep = rec.get("ep") or ep
-            est_rho = estimate_density_gcc(rec.get("mp_earth"), rec.get("pl_rade"))
-            dp = est_rho or dp
+            Ts, rs, ms, mp, ap, ep, dp = _apply_record(rec, Ts, rs, ms, mp, ap, ep, dp)
         except Exception as e:
             status = f"Error fetching '{picked}': {e}"
     #Default/first load fallback (must return all 14 values)
@@ -351,12 +396,14 @@ def populate_from_url_or_nasa(url_search, n_clicks, pl_value, mm_val, ah_val, em
     State("mm_earth", "value"), State("am_hill", "value"), State("em", "value"),
     State("moon_dir", "value"), State("sim_years", "value"),
     prevent_initial_call=True,
+    background=_background_manager is not None,
+    running=[(Output("run-btn", "disabled"), True, False)],  # no duplicate runs queued by repeated clicks
 )
 def run_cb(n_clicks, kick, Ts, rs_solar, ms_solar, mp_earth, dp_cgs, ap_AU, ep,
            mm_earth, am_hill, em, moon_dir, sim_years):
     if not (n_clicks or (kick == "run")):
         return _initial_figure(), ""
-    d = SystemParams()
+    d = _defaults
     p = SystemParams(
         Ts=_fnum(Ts, d.Ts), rs_solar=_fnum(rs_solar, d.rs_solar), ms_solar=_fnum(ms_solar, d.ms_solar),
         mp_earth=_fnum(mp_earth, d.mp_earth), dp_cgs=_fnum(dp_cgs, d.dp_cgs),
@@ -364,14 +411,17 @@ def run_cb(n_clicks, kick, Ts, rs_solar, ms_solar, mp_earth, dp_cgs, ap_AU, ep,
         mm_earth=_fnum(mm_earth, d.mm_earth), am_hill=_fnum(am_hill, d.am_hill), em=_fnum(em, d.em),
         moon_retrograde=(moon_dir == "retro"),
     )
-    yrs = _fnum(sim_years, 0.0)
+    return _render_sim(p, _fnum(sim_years, 0.0))
+
+@lru_cache(maxsize=4)
+def _render_sim(p: SystemParams, yrs: float):
+    # (figure, sim ref) depend only on (p, yrs): re-running unchanged inputs is a cache hit.
+    # Callers must not mutate the returned figure.
     if yrs > 0:
-        from exomoon.simulation import run_simulation_for_years
-        sim = run_simulation_for_years(p, yrs)
+        sim = cached_simulation(p, yrs)
         duration_label = f"{yrs:.3f} years"
     else:
-        from exomoon.simulation import run_simulation
-        sim = run_simulation(p)
+        sim = cached_simulation(p)
         duration_label = "1 planet orbit"
 
     fig = build_animation(sim["traj"], sim["a_inner_au"], sim["a_outer_au"],
@@ -380,13 +430,53 @@ def run_cb(n_clicks, kick, Ts, rs_solar, ms_solar, mp_earth, dp_cgs, ap_AU, ep,
     rhill = st.get("rhill_AU")
     if isinstance(rhill, (int, float)):
         dir_txt = "Retrograde" if p.moon_retrograde else "Prograde"
-        fig.add_annotation(
+        fig["layout"].setdefault("annotations", []).append(dict(
             text=f"Hill radius: {rhill:.4f} AU | a_moon≈{p.am_hill*rhill:.4f} AU | {dir_txt} | {duration_label}",
             xref="paper", yref="paper", x=0.01, y=1.06,
             showarrow=False, align="left", font=dict(size=12)
-        )
-    packed = pack_sim(sim)
-    return fig, packed
+        ))
+    # simdata holds only what identifies the run; the trajectory stays on the server
+    ref = json.dumps({"params": asdict(p), "years": yrs})
+    # Arrays pre-encoded once here, not by Dash's serializer on every return
+    return encode_arrays(fig), ref
+
+_SIM_ARRAYS_MAX = 4
+_SIM_ARRAYS_MAX_BYTES = 256 * 2**20  # decoded columns are several times the trajectory's size
+_sim_arrays_cache: "OrderedDict[str, dict]" = OrderedDict()
+_sim_arrays_bytes = 0
+_sim_arrays_lock = threading.Lock()
+
+def _columns_nbytes(cols: dict) -> int:
+    return sum(a.nbytes for a in cols.values())
+
+def _sim_arrays(ref: str) -> dict:
+    # Trajectory columns for a simdata ref. The run is deterministic, so if the simulation cache
+    # has evicted it (or the server restarted) it is simply recomputed.
+    # The arrays are shared between calls, so callers must not modify them.
+    global _sim_arrays_bytes
+    with _sim_arrays_lock:
+        cols = _sim_arrays_cache.get(ref)
+        if cols is not None:
+            _sim_arrays_cache.move_to_end(ref)
+            return cols
+    spec = json.loads(ref)
+    p, yrs = SystemParams(**spec["params"]), float(spec["years"])
+    cols = traj_to_arrays(cached_simulation(p, yrs) if yrs > 0 else cached_simulation(p))
+    with _sim_arrays_lock:
+        old = _sim_arrays_cache.pop(ref, None)
+        if old is not None:
+            _sim_arrays_bytes -= _columns_nbytes(old)
+        _sim_arrays_cache[ref] = cols
+        _sim_arrays_bytes += _columns_nbytes(cols)
+        # Same LRU-by-count-and-size policy as the simulation cache (the newest entry always stays)
+        while len(_sim_arrays_cache) > 1 and (len(_sim_arrays_cache) > _SIM_ARRAYS_MAX
+                                              or _sim_arrays_bytes > _SIM_ARRAYS_MAX_BYTES):
+            _, evicted = _sim_arrays_cache.popitem(last=False)
+            _sim_arrays_bytes -= _columns_nbytes(evicted)
+    return cols
+
+_CSV_CACHE_MAX_BYTES = 128 * 2**20
+_last_csv: tuple[str, dict] | None = None  # (simdata ref, dcc.send_bytes payload) of the last export
 
 # NEW: CSV export button
 @app.callback(
@@ -395,13 +485,18 @@ def run_cb(n_clicks, kick, Ts, rs_solar, ms_solar, mp_earth, dp_cgs, ap_AU, ep,
     State("simdata", "data"),
     prevent_initial_call=True,
 )
-def export_csv(n_clicks, packed):
-    if not packed:
+def export_csv(n_clicks, ref):
+    global _last_csv
+    if not ref:
         return no_update
-    sim = unpack_sim(packed)
-    frame = traj_to_frame(sim)
-    csv_bytes = to_csv_bytes(frame)
-    return dcc.send_bytes(csv_bytes, "exomoon_simulation.csv")
+    last = _last_csv
+    if last is not None and last[0] == ref:
+        return last[1]
+    csv_bytes = to_csv_bytes(_sim_arrays(ref))
+    download = dcc.send_bytes(csv_bytes, "exomoon_simulation.csv")
+    # Repeat clicks for the same run reuse the encoded download (unless it is too big to keep)
+    _last_csv = (ref, download) if len(csv_bytes) <= _CSV_CACHE_MAX_BYTES else None
+    return download
 
 # NEW: Populate EDA var list when we have data
 @app.callback(
@@ -409,12 +504,10 @@ def export_csv(n_clicks, packed):
     [Input("simdata", "data"), Input("url", "pathname")],  # also trigger on navigation to /eda
     prevent_initial_call=False,
 )
-def load_variables(packed, pathname):
-    if not packed:
+def load_variables(ref, pathname):
+    if not ref:
         return [], "No simulation data yet. Run a simulation first."
-    sim = unpack_sim(packed)
-    frame = traj_to_frame(sim)
-    cols = frame.columns.tolist() if hasattr(frame, "columns") else list(frame.keys())
+    cols = list(_sim_arrays(ref).keys())
     opts = [{"label": c, "value": c} for c in cols if c != "t_years"]
     return opts, f"Loaded {len(cols)-1} variables."
 
@@ -426,30 +519,31 @@ def load_variables(packed, pathname):
     prevent_initial_call=True,
 )
 
-def eda_plot(vars_selected, ptype, norm_opts, packed):
-    import plotly.graph_objects as go
-    if not packed or not vars_selected:
+def eda_plot(vars_selected, ptype, norm_opts, ref):
+    if not ref or not vars_selected:
         return go.Figure()
-    sim = unpack_sim(packed)
-    frame = traj_to_frame(sim)
-    t = frame["t_years"]
-    # Use positional array to avoid pandas label indexing for -1
-    t_arr = t.to_numpy() if hasattr(t, "to_numpy") else np.asarray(t)
+    frame = _sim_arrays(ref)
+    t_arr = frame["t_years"]
 
     vars_selected = vars_selected or []
     normalize = "norm" in (norm_opts or [])
 
-    fig = go.Figure()
-    for v in vars_selected:
-        if v not in frame:
-            continue
-        y = frame[v]
+    # Plain trace dicts + one Figure() call: schema validation runs once, WebGL rendering
+    mode = "markers" if ptype == "scatter" else "lines"
+    plotted = [v for v in vars_selected if v in frame]
+    traces = []
+    if plotted:
+        # Per-bucket min/max envelope: long runs ship a few thousand points per series
+        keep = [envelope_indices(frame[v]) for v in plotted]
+        ys = [np.asarray(frame[v], dtype=np.float64)[k] for v, k in zip(plotted, keep)]  # gathered copies
         if normalize:
-            m = float(np.max(np.abs(y))) if len(y) else 1.0
-            y = y / (m if m != 0 else 1.0)
-        mode = "markers" if ptype == "scatter" else "lines"
-        label, _unit = var_info(v)
-        fig.add_trace(go.Scatter(x=t_arr, y=y, mode=mode, name=label))
+            # Scale by the full series' peak |y|, not just the gathered points'
+            for v, y in zip(plotted, ys):
+                m = np.max(np.abs(frame[v])) if y.size else 0.0
+                if m:
+                    y /= m
+        traces = [dict(type="scattergl", x=t_arr[k], y=y, mode=mode, name=var_info(v)[0])
+                  for v, k, y in zip(plotted, keep, ys)]
 
     # Dynamic title
     if len(vars_selected) == 1:
@@ -464,7 +558,7 @@ def eda_plot(vars_selected, ptype, norm_opts, packed):
     if normalize:
         ytitle = "Normalized Value"
     else:
-        units = {var_info(v)[1] for v in vars_selected if v in frame}
+        units = {var_info(v)[1] for v in plotted}
         units.discard(None)
         if len(units) == 1:
             ytitle = f"Value ({list(units)[0]})"
@@ -476,10 +570,10 @@ def eda_plot(vars_selected, ptype, norm_opts, packed):
     # Axes ranges: always show full time
     xmin = float(t_arr[0]) if len(t_arr) else 0.0
     xmax = float(t_arr[-1]) if len(t_arr) else 1.0
-    fig.update_xaxes(range=[xmin, xmax])
+    yaxis = dict(title=ytitle, autorange=True)
 
-    if len(vars_selected) == 1 and vars_selected[0] in frame:
-        y0 = frame[vars_selected[0]]
+    if len(vars_selected) == 1 and len(traces) == 1:
+        y0 = traces[0]["y"]  # as plotted (normalized if requested)
         ymin, ymax = float(np.min(y0)), float(np.max(y0))
         if ymin == ymax:
             pad = 1.0 if ymax == 0.0 else 0.05 * abs(ymax)
@@ -488,19 +582,16 @@ def eda_plot(vars_selected, ptype, norm_opts, packed):
             span = ymax - ymin
             pad = 0.05 * span
             ymin -= pad; ymax += pad
-        fig.update_yaxes(range=[ymin, ymax])
-    else:
-        fig.update_yaxes(autorange=True)
+        yaxis = dict(title=ytitle, range=[ymin, ymax])
 
-    fig.update_layout(
+    return go.Figure(data=traces, layout=dict(
         title=title,
-        xaxis_title="Time (years)",
-        yaxis_title=ytitle,
+        xaxis=dict(title="Time (years)", range=[xmin, xmax]),
+        yaxis=yaxis,
         height=800,
         margin=dict(l=40, r=20, t=50, b=40),
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
-    return fig
+    ))
 
 # NEW: Back button to navigate to main page
 @app.callback(
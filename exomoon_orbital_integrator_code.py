@@ -1,10 +1,18 @@
 """import files - matplotlib for plotting; numpy for numerical calculations""" 
+import math
 import matplotlib.pyplot as plt
 import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.io as pio
 
+try:
+    from numba import njit
+except ImportError:
+    # numba not installed: run the integrator as plain Python
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
 # Ensure Plotly opens in a web browser with full animation controls when run from VS Code/terminal
 pio.renderers.default = "browser"
 
@@ -24,13 +32,9 @@ cspeed = 2.99792e8 #light speed
 stefboltz = 5.6696e-8 #Watts m^-2 K^-4
 parsec = 3.0856e16 #meters
 F_earth = 1370. #W/m^2
+FOUR_PI_SQ = 4.*math.pi**2 #G in AU^3 Msun^-1 yr^-2
 #print(au)
 #
-"""create lists for storing data"""
-xyzlist_mp = []
-xyzlist_ms = []
-xyzlist_mm = []
-
 """initialize run parameters"""
 Ts = 3784 #star temperature in K
 rs = 0.51 #star radius in solar radii
@@ -45,9 +49,9 @@ em = 0.0 #eccentricity of moon around star; moon will start at periapse
 """unit conversions"""
 rp = (0.75*mp*merth/(dp*1.e3))**(1./3.)/1.e3 #planet radius in km if needed
 rs = rs * rsun  # star radius in meters
-ms = ms*4.*np.pi**2 
-mp = mp*merth/msun*4.*np.pi**2
-mm = mm*merth/msun*4.*np.pi**2
+ms = ms*FOUR_PI_SQ
+mp = mp*merth/msun*FOUR_PI_SQ
+mm = mm*merth/msun*FOUR_PI_SQ
 
 rhill = ap*(1-ep)*(mp/3/ms)**0.5 #Hill radius around planet in AU 
 #The (1-e) factor in the Hill-radius is described in Hamilton and Burns (1992)
@@ -80,24 +84,17 @@ vxm = vzm = 0. #velocity of moon relative to planet-moon barycenter in AU/yr
 vym = mp/((1-em)*(mp+mm)*am)**0.5 #velocity of moon relative to planet-moon barycenter in AU/yr
 vym = vypm + vym #velocity of moon relative to system barycenter in AU
 #
-pos_arr_mp = np.array([xp,yp,zp])
-pos_arr_ms = np.array([xs,ys,zs])
-pos_arr_mm = np.array([xm,ym,zm])
-vel_arr_mp = np.array([vxp,vyp,vzp])
-vel_arr_ms = np.array([vxs,vys,vzs])
-vel_arr_mm = np.array([vxm,vym,vzm])
-#
 
 # Calculate star luminosity (Watts)
-L_star = 4 * np.pi * rs**2 * stefboltz * Ts**4
+L_star = 4 * math.pi * rs**2 * stefboltz * Ts**4
 
 # Habitable zone flux boundaries (W/m^2)
 F_inner = 1.1 * F_earth  
 F_outer = 0.5 * F_earth  
 
 # Calculate distance boundaries in meters
-a_inner = np.sqrt(L_star / (4 * np.pi * F_inner))
-a_outer = np.sqrt(L_star / (4 * np.pi * F_outer))
+a_inner = math.sqrt(L_star / (4 * math.pi * F_inner))
+a_outer = math.sqrt(L_star / (4 * math.pi * F_outer))
 
 # Convert to AU
 a_inner_au = a_inner / au
@@ -106,49 +103,77 @@ a_outer_au = a_outer / au
 print("Inner Habitable Zone (AU):", a_inner_au)
 print("Outer Habitable Zone (AU):", a_outer_au)
 
-t = 0
-orbprd_mm_ms = 2.*np.pi*ap**1.5/(mp+ms)**0.5#yrs
-orbprd_mm_mp = 2.*np.pi*am**1.5/(mp+mm)**0.5#yrs
+@njit(cache=True, fastmath=True)
+def accelerations(xp, yp, zp, xs, ys, zs, xm, ym, zm, ms, mp, mm):
+    """planet, star, moon accelerations; one displacement and r^-3 = (r^2)^-1.5 per pair"""
+    dx_ps = xp - xs; dy_ps = yp - ys; dz_ps = zp - zs
+    inv_r3_ps = (dx_ps*dx_ps + dy_ps*dy_ps + dz_ps*dz_ps)**-1.5
+    dx_pm = xp - xm; dy_pm = yp - ym; dz_pm = zp - zm
+    inv_r3_pm = (dx_pm*dx_pm + dy_pm*dy_pm + dz_pm*dz_pm)**-1.5
+    dx_sm = xs - xm; dy_sm = ys - ym; dz_sm = zs - zm
+    inv_r3_sm = (dx_sm*dx_sm + dy_sm*dy_sm + dz_sm*dz_sm)**-1.5
+    return (-(ms*dx_ps*inv_r3_ps + mm*dx_pm*inv_r3_pm),
+            -(ms*dy_ps*inv_r3_ps + mm*dy_pm*inv_r3_pm),
+            -(ms*dz_ps*inv_r3_ps + mm*dz_pm*inv_r3_pm),
+            mp*dx_ps*inv_r3_ps - mm*dx_sm*inv_r3_sm,
+            mp*dy_ps*inv_r3_ps - mm*dy_sm*inv_r3_sm,
+            mp*dz_ps*inv_r3_ps - mm*dz_sm*inv_r3_sm,
+            mp*dx_pm*inv_r3_pm + ms*dx_sm*inv_r3_sm,
+            mp*dy_pm*inv_r3_pm + ms*dy_sm*inv_r3_sm,
+            mp*dz_pm*inv_r3_pm + ms*dz_sm*inv_r3_sm)
+
+@njit(cache=True, fastmath=True)
+def integrate(xp, yp, zp, xs, ys, zs, xm, ym, zm,
+              vxp, vyp, vzp, vxs, vys, vzs, vxm, vym, vzm,
+              ms, mp, mm, dt, nsteps, record_stride, traj):
+    """leapfrog integration; every record_stride-th step writes planet, star, moon x/y/z
+    and the moon's x/y/z relative to the planet into a row of traj"""
+    half_dt = 0.5*dt
+    # kick-drift-kick: the closing half-kick's accelerations open the next step
+    axp, ayp, azp, axs, ays, azs, axm, aym, azm = accelerations(
+        xp, yp, zp, xs, ys, zs, xm, ym, zm, ms, mp, mm)
+    for i in range(nsteps):
+        # half-kick all velocities
+        vxp += axp*half_dt; vyp += ayp*half_dt; vzp += azp*half_dt
+        vxs += axs*half_dt; vys += ays*half_dt; vzs += azs*half_dt
+        vxm += axm*half_dt; vym += aym*half_dt; vzm += azm*half_dt
+        # drift all positions a full step
+        xp += vxp*dt; yp += vyp*dt; zp += vzp*dt
+        xs += vxs*dt; ys += vys*dt; zs += vzs*dt
+        xm += vxm*dt; ym += vym*dt; zm += vzm*dt
+        # the step's single force evaluation, then the closing half-kick
+        axp, ayp, azp, axs, ays, azs, axm, aym, azm = accelerations(
+            xp, yp, zp, xs, ys, zs, xm, ym, zm, ms, mp, mm)
+        vxp += axp*half_dt; vyp += ayp*half_dt; vzp += azp*half_dt
+        vxs += axs*half_dt; vys += ays*half_dt; vzs += azs*half_dt
+        vxm += axm*half_dt; vym += aym*half_dt; vzm += azm*half_dt
+        # write position data
+        if i % record_stride == 0:
+            k = i // record_stride
+            traj[k, 0] = xp; traj[k, 1] = yp; traj[k, 2] = zp
+            traj[k, 3] = xs; traj[k, 4] = ys; traj[k, 5] = zs
+            traj[k, 6] = xm; traj[k, 7] = ym; traj[k, 8] = zm
+            traj[k, 9] = xm - xp; traj[k, 10] = ym - yp; traj[k, 11] = zm - zp
+
+orbprd_mm_ms = 2.*math.pi*ap**1.5/(mp+ms)**0.5#yrs
+orbprd_mm_mp = 2.*math.pi*am**1.5/(mp+mm)**0.5#yrs
 dt = orbprd_mm_mp/1.e3 #years #runs a 1000 steps per moon-planet orbit
 tend = orbprd_mm_ms #years
-#print(orbprd_mm_mp)
-#print("\n")
-"""start time loop"""
-while (t < tend):  
-    t = t + dt
-    #print(t)  # Commented to avoid slowing down runs; re-enable if needed
-    """do a leapfrog step"""
-    """move planet"""
-    pos_arr2_mp = pos_arr_mp + vel_arr_mp*dt/2
-    accel = -1*ms*(pos_arr2_mp-pos_arr_ms)/np.linalg.norm(pos_arr2_mp-pos_arr_ms)**3 + \
-            -1*mm*(pos_arr2_mp-pos_arr_mm)/np.linalg.norm(pos_arr2_mp-pos_arr_mm)**3
-    vel_arr_mp = vel_arr_mp + accel*dt
-    pos_arr_mp = pos_arr2_mp + vel_arr_mp*dt/2
-    """move star"""
-    pos_arr2_ms = pos_arr_ms + vel_arr_ms*dt/2
-    accel = -1*mp*(pos_arr2_ms-pos_arr_mp)/np.linalg.norm(pos_arr2_ms-pos_arr_mp)**3 + \
-            -1*mm*(pos_arr2_ms-pos_arr_mm)/np.linalg.norm(pos_arr2_ms-pos_arr_mm)**3
-    vel_arr_ms = vel_arr_ms + accel*dt
-    pos_arr_ms = pos_arr2_ms + vel_arr_ms*dt/2
-    """move moon"""
-    pos_arr2_mm = pos_arr_mm + vel_arr_mm*dt/2
-    accel = -1*mp*(pos_arr2_mm-pos_arr_mp)/np.linalg.norm(pos_arr2_mm-pos_arr_mp)**3 + \
-            -1*ms*(pos_arr2_mm-pos_arr_ms)/np.linalg.norm(pos_arr2_mm-pos_arr_ms)**3
-    vel_arr_mm = vel_arr_mm + accel*dt
-    pos_arr_mm = pos_arr2_mm + vel_arr_mm*dt/2
-    """write position data to lists"""
-    xyzlist_mp.append(pos_arr_mp) 
-    xyzlist_ms.append(pos_arr_ms) 
-    xyzlist_mm.append(pos_arr_mm) 
-"""end time loop"""
+nsteps = math.ceil(tend/dt)
+record_stride = 20 #store every 20th step: 50 points per moon-planet orbit for trails and frames
+"""run the time loop"""
+traj = np.empty(((nsteps + record_stride - 1)//record_stride, 12), dtype=np.float32)
+integrate(xp, yp, zp, xs, ys, zs, xm, ym, zm,
+          vxp, vyp, vzp, vxs, vys, vzs, vxm, vym, vzm,
+          ms, mp, mm, dt, nsteps, record_stride, traj)
 
 """create figure - can change numbers to make different size"""    
 fig, ax = plt.subplots(figsize=(6,6))
 ax.grid()
 """plot data for three objects"""
-xyzarr_mp = np.array(xyzlist_mp)
-xyzarr_mm = np.array(xyzlist_mm)
-xyzarr_ms = np.array(xyzlist_ms)
+xyzarr_mp = traj[:, 0:3]
+xyzarr_ms = traj[:, 3:6]
+xyzarr_mm = traj[:, 6:9]
 
 timesteps = len(xyzarr_mp)  # total steps from your simulation
 
@@ -157,13 +182,14 @@ frame_stride = max(1, timesteps // 1000)
 frame_indices = list(range(0, timesteps, frame_stride))
 
 # Calculate axis ranges based on all objects
-all_x = np.concatenate([xyzarr_ms[:,0], xyzarr_mp[:,0], xyzarr_mm[:,0]])
-all_y = np.concatenate([xyzarr_ms[:,1], xyzarr_mp[:,1], xyzarr_mm[:,1]])
-x_range = [-1.2*max(np.abs(all_x)), 1.2*max(np.abs(all_x))]
-y_range = [-1.2*max(np.abs(all_y)), 1.2*max(np.abs(all_y))]
+# (body x columns are 0:9:3 and y columns 1:9:3 of traj; no concatenated copy)
+x_max = np.abs(traj[:, 0:9:3]).max()
+y_max = np.abs(traj[:, 1:9:3]).max()
+x_range = [-1.2*x_max, 1.2*x_max]
+y_range = [-1.2*y_max, 1.2*y_max]
 
 # Calculate moon's relative positions to the planet for each frame
-moon_rel = xyzarr_mm - xyzarr_mp  # shape: (timesteps, 3)
+moon_rel = traj[:, 9:12]  # shape: (timesteps, 3); recorded by integrate()
 
 # Zoom panel range (symmetric)
 r_rel = 1.2 * np.max(np.sqrt(moon_rel[:,0]**2 + moon_rel[:,1]**2))
@@ -188,21 +214,24 @@ fig = make_subplots(
 )
 
 # Create frames for animation - each frame updates positions of all 3 bodies
-frames = []
-
-for i in frame_indices:
-    frames.append(
-        go.Frame(
-            data=[
-                go.Scatter(x=[xyzarr_ms[i,0]], y=[xyzarr_ms[i,1]]),   # left star
-                go.Scatter(x=[xyzarr_mp[i,0]], y=[xyzarr_mp[i,1]]),   # left planet
-                go.Scatter(x=[xyzarr_mm[i,0]], y=[xyzarr_mm[i,1]]),   # left moon
-                go.Scatter(x=[moon_rel[i,0]], y=[moon_rel[i,1]]),     # right moon
-            ],
-            traces=[3, 4, 5, 8],
-            name=str(i)
-        )
+# (frame samples sliced out once with fancy indexing; plain dicts, no go.Frame/go.Scatter per frame)
+ms_frames = xyzarr_ms[frame_indices, :2].tolist()
+mp_frames = xyzarr_mp[frame_indices, :2].tolist()
+mm_frames = xyzarr_mm[frame_indices, :2].tolist()
+rel_frames = moon_rel[frame_indices, :2].tolist()
+frames = [
+    dict(
+        data=[
+            dict(x=[s[0]], y=[s[1]]),   # left star
+            dict(x=[p[0]], y=[p[1]]),   # left planet
+            dict(x=[m[0]], y=[m[1]]),   # left moon
+            dict(x=[r[0]], y=[r[1]]),   # right moon
+        ],
+        traces=[3, 4, 5, 8],
+        name=str(i)
     )
+    for i, s, p, m, r in zip(frame_indices, ms_frames, mp_frames, mm_frames, rel_frames)
+]
 fig.frames = frames
 
 # Initial data for the first frame - also add orbital trails
@@ -348,4 +377,5 @@ fig.update_layout(
 #fig.savefig("myxyorbitplot.jpg")
 fig.show(renderer="browser")
 
-fig.write_html('orbit_anim.html')  
\ No newline at end of file
+# plotly.js goes to a shared plotly.min.js beside the page (still works offline), not inlined
+fig.write_html('orbit_anim.html', include_plotlyjs='directory')  
\ No newline at end of file